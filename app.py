@@ -15,15 +15,18 @@ import json
 import threading
 import time
 import csv
-import pyautogui
-import pyperclip
-import pygetwindow as gw
 import random
 import requests
-from io import StringIO
-import win32gui
-import win32con
+import http_session
+import screen_backend
 import os
+import sqlite3
+import codecs
+import hashlib
+import re
+import itertools
+import socket
+# v2.1: cv2/numpy는 처음 인식할 때 임포트 (대시보드 시작 속도) - warm_up()이 미리 로드
 
 app = Flask(__name__)
 app.config['JSON_AS_ASCII'] = False  # 한글 인코딩 문제 해결
@@ -38,22 +41,211 @@ GOOGLE_SHEET_URL = "https://docs.google.com/spreadsheets/d/1zDsFPQyrpSGiUvJ3eAqJ
 
 # 전역 변수
 current_task = None
-task_status = {
-    'running': False,
-    'current': 0,
-    'total': 0,
-    'logs': [],
-    'success_count': 0,
-    'fail_count': 0,
-    'sheet_url': GOOGLE_SHEET_URL,
-    'selected_addressbook': None,
-    'icon_found': False,  # v2.0: 아이콘 발견 여부
-    'icon_location': None  # v2.0: 아이콘 위치
-}
+
+class EventNotifier:
+    """
+    v2.1: 로그/작업 상태 변경 알림
+
+    바뀔 때마다 버전 번호를 올리고 기다리는 SSE 구독자를 모두 깨웁니다.
+    구독자는 마지막으로 본 버전을 넘겨서 그 사이의 변경을 놓치지 않습니다.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self._changed = threading.Condition()
+
+    def notify(self):
+        with self._changed:
+            self.version += 1
+            self._changed.notify_all()
+
+    def wait(self, version, timeout):
+        """version 이후 변경이 있을 때까지 최대 timeout초 대기 (현재 버전 반환)"""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+event_notifier = EventNotifier()
+
+class TaskState:
+    """
+    v2.1: 작업 상태 (스레드 안전)
+
+    작업 스레드와 /api/status, /api/stop 등 요청 스레드가 함께 사용하므로
+    값을 바꿀 때는 update()/increment()로 잠금 안에서 바꾸고, 바뀌면 notifier로 알립니다.
+    snapshot()은 잠금 안에서 만든 복사본이며 로그는 포함하지 않습니다 (로그는 log_buffer).
+
+    실행/중단 전환(running 변경)은 순번과 함께 따로 기록하므로(transitions_since), SSE가 상태를
+    합쳐서 보내는 사이에 시작과 중단이 함께 일어나도 전환을 놓치지 않습니다.
+
+    작업마다 중단 이벤트(stop_event)를 따로 만듭니다. 중단 요청은 그 작업의 이벤트만 set하므로
+    중단 직후 새 작업이 시작되어도 이전 작업 스레드가 다시 진행하지 않습니다.
+    """
+
+    FIELDS = (
+        'running', 'current', 'total',
+        'success_count', 'fail_count',
+        'skip_count',  # 이미 처리되어 건너뛴 수
+        'invalid_count',  # 잘못된/중복 번호로 제외한 수
+        'sheet_url', 'selected_addressbook',
+        'icon_found', 'icon_location',  # v2.0: 아이콘 발견 여부/위치
+        'sync_progress'  # 시트 수집 진행 상황
+    )
+    COUNTERS = ('current', 'total', 'success_count', 'fail_count', 'skip_count', 'invalid_count')
+
+    TRANSITION_HISTORY = 32  # 보관할 최근 실행/중단 전환 수
+
+    __slots__ = FIELDS + ('_lock', '_notifier', 'stop_event', '_transitions', '_transition_seq')
+
+    def __init__(self, sheet_url, notifier):
+        self._lock = threading.Lock()
+        self._notifier = notifier
+        self.running = False
+        for name in self.COUNTERS:
+            setattr(self, name, 0)
+        self.sheet_url = sheet_url
+        self.selected_addressbook = None
+        self.icon_found = False
+        self.icon_location = None
+        self.sync_progress = {'state': 'idle', 'rows': 0, 'bytes': 0}
+        self.stop_event = threading.Event()
+        self._transitions = []  # [(순번, running), ...]
+        self._transition_seq = 0
+
+    def _set_running(self, running):
+        """running 변경 (잠금 안에서 호출) - 바뀌면 전환 기록"""
+        if running == self.running:
+            return
+        self.running = running
+        self._transition_seq += 1
+        self._transitions.append((self._transition_seq, running))
+        del self._transitions[:-self.TRANSITION_HISTORY]
+
+    def transition_seq(self):
+        """마지막 실행/중단 전환 순번"""
+        with self._lock:
+            return self._transition_seq
+
+    def transitions_since(self, seq):
+        """seq 이후의 실행/중단 전환 [(순번, running), ...]"""
+        with self._lock:
+            return [t for t in self._transitions if t[0] > seq]
+
+    def begin(self, previous_worker=None):
+        """
+        작업 시작 (확인과 시작을 한 번에)
+
+        Args:
+            previous_worker: 이전 작업 스레드 - 중단 요청 후에도 아직 끝나지 않았으면 시작하지 않음
+
+        Returns:
+            threading.Event: 이 작업의 중단 이벤트
+            None: 이미 실행 중이거나 이전 작업이 아직 끝나지 않은 경우
+        """
+        with self._lock:
+            if self.running or (previous_worker is not None and previous_worker.is_alive()):
+                return None
+            self._set_running(True)
+            for name in self.COUNTERS:
+                setattr(self, name, 0)
+            self.stop_event = threading.Event()
+            stop_event = self.stop_event
+        self._notifier.notify()
+        return stop_event
+
+    def stop(self):
+        """현재 작업 중단 요청"""
+        with self._lock:
+            self._set_running(False)
+            self.stop_event.set()
+        self._notifier.notify()
+
+    def update(self, **fields):
+        with self._lock:
+            for name, value in fields.items():
+                if name == 'running':
+                    self._set_running(value)
+                else:
+                    setattr(self, name, value)
+        self._notifier.notify()
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            value = getattr(self, name) + amount
+            setattr(self, name, value)
+        self._notifier.notify()
+        return value
+
+    def touch(self):
+        """sync_progress처럼 제자리에서 바뀐 값을 알림"""
+        self._notifier.notify()
+
+    def snapshot(self):
+        """상태 복사본 (dict)"""
+        with self._lock:
+            result = {name: getattr(self, name) for name in self.FIELDS}
+        for name in ('selected_addressbook', 'icon_location', 'sync_progress'):
+            if result[name] is not None:
+                result[name] = dict(result[name])
+        return result
+
+task_state = TaskState(GOOGLE_SHEET_URL, event_notifier)
 
 # v2.0: 전역 변수 - 아이콘 위치
 ICON_LOCATION = None
 
+# v2.1: 아이콘 인식 (cv2.matchTemplate 한 번으로 모든 신뢰도 판정)
+ICON_PATH = "person_plus_icon.png"
+ICON_CONFIDENCES = [0.9, 0.8, 0.7, 0.6]  # 높은 순 - 최고 점수가 넘는 첫 단계를 신뢰도로 보고
+ICON_SCALES = [1.0, 1.25, 1.5, 1.75, 2.0, 0.8]  # DPI 배율 (100%부터, 찾으면 중단)
+
+# v2.1: UI 템플릿 이미지 (시작할 때 한 번 로드, 없는 파일은 건너뜀)
+TEMPLATE_FILES = {
+    'person_plus': ICON_PATH,
+    'add_friend_dialog': "add_friend_dialog.png",
+    'chat_window': "chat_window.png",
+    'error_popup': "error_popup.png"
+}
+
+# v2.1: 아이콘 위치 캐시 (창 크기 + DPI + 카톡 버전이 같으면 전체 검색 생략)
+ICON_CACHE_FILE = "onlytalk_icon_cache.json"
+ICON_CACHE_MARGIN = 16  # 캐시 위치 확인 시 아이콘 주변으로 더 캡처할 픽셀
+ICON_CACHE_MIN_SCORE = 0.8  # 캐시 위치를 믿을 최소 일치도
+
+# v2.1: 친구 추가 단계별 UI 상태 대기 (고정 대기 대신 화면 상태 확인)
+UI_STEP_TIMEOUT = 10.0  # 단계별 최대 대기 시간 (초)
+UI_POLL_INTERVAL = 0.1  # 상태 확인 간격 (초)
+UI_SETTLE_DELAY = 0.3  # 상태 확인 후 입력 전 여유 (초)
+UI_TEMPLATE_MIN_SCORE = 0.8  # 템플릿이 화면에 있다고 볼 최소 일치도
+UI_TEMPLATE_MARGIN = 200  # 템플릿 검색 시 카톡 창 주변으로 더 캡처할 픽셀
+ACTIVATE_CHECK_TIMEOUT = 0.5  # activate() 한 번 후 포그라운드 확인 대기 (초)
+
+# v2.1: 주소록 로컬 저장소 (SQLite)
+CONTACT_DB_FILE = "onlytalk_contacts.db"
+SYNC_PROGRESS_INTERVAL = 1000  # 수집 진행 상황 갱신 간격 (행)
+SYNC_LOG_INTERVAL = 10000  # 수집 진행 로그 간격 (행)
+FRIENDS_PAGE_SIZE = 100  # /api/friends 기본 페이지 크기
+FRIENDS_PAGE_MAX = 500  # /api/friends 최대 페이지 크기
+VALIDATION_SAMPLE_SIZE = 20  # 검증 리포트에 포함할 오류 행 수
+JOB_SHEET_MAX_AGE = 300  # 작업 시작 시 이 시간(초) 안에 동기화된 저장소는 그대로 사용
+
+# v2.1: 로그 버퍼 (링 버퍼, 순번으로 이어 읽기)
+LOG_BUFFER_SIZE = 1000
+SSE_HEARTBEAT_INTERVAL = 15  # 새 로그가 없을 때 연결 유지용 주석 전송 간격 (초)
+SSE_RETRY_MS = 3000  # 연결이 끊기면 브라우저가 다시 연결할 때까지 대기 (ms)
+STATUS_PUSH_RATE = 4  # /api/events 작업 상태 이벤트 최대 전송 횟수 (초당)
+
+# v2.1: 대시보드 서버 (설정 파일 server_host/server_port/server_mode 또는 환경 변수로 변경)
+SERVER_HOST = "0.0.0.0"  # 같은 네트워크에서도 접속 가능
+SERVER_PORT = 5000
+SERVER_MODE = "waitress"  # waitress (운영) / dev (Flask 개발 서버)
+SERVER_THREADS = 8  # waitress 작업 스레드 수 (SSE 연결도 하나씩 사용)
+SERVER_BACKLOG = 1024  # listen 대기열 (waitress 기본값)
+SSE_MAX_SUBSCRIBERS = SERVER_THREADS - 2  # 일반 요청용 스레드는 남겨 둠
+
+# v2.1: 작업 체크포인트 (중단된 작업 이어서 하기)
+CHECKPOINT_FILE = "onlytalk_checkpoint.log"
+
 def load_config():
     """설정 파일 로드"""
     if os.path.exists(CONFIG_FILE):
@@ -66,78 +258,887 @@ def get_license_key():
     config = load_config()
     return config.get('license_key', None)
 
+class LogBuffer:
+    """
+    v2.1: 고정 크기 링 버퍼 로그 저장소
+
+    로그마다 1부터 증가하는 순번(seq)을 붙입니다. 추가는 O(1)이고,
+    since(seq)는 버퍼 전체를 복사하지 않고 그 뒤의 로그만 돌려줍니다.
+    용량을 넘으면 가장 오래된 로그부터 덮어씁니다.
+    wait_since(seq)는 새 로그가 추가될 때까지 잠들어 있다가 깨어납니다 (SSE 구독자용).
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._items = [None] * capacity
+        self._next_seq = 1  # 다음에 붙일 순번
+        self._first_seq = 1  # clear() 이후 첫 순번
+        self._lock = threading.Lock()
+        self._appended = threading.Condition(self._lock)
+        self.subscribers = 0  # 연결된 SSE 구독자 수
+
+    def append(self, message):
+        with self._lock:
+            entry = {
+                'seq': self._next_seq,
+                'time': time.strftime('%H:%M:%S'),
+                'message': message
+            }
+            self._items[self._next_seq % self.capacity] = entry
+            self._next_seq += 1
+            self._appended.notify_all()
+        return entry
+
+    def _oldest_seq(self):
+        return max(self._first_seq, self._next_seq - self.capacity)
+
+    def _since(self, seq, limit):
+        start = max(seq + 1, self._oldest_seq())
+        end = self._next_seq if limit is None else min(self._next_seq, start + limit)
+        return [self._items[s % self.capacity] for s in range(start, end)]
+
+    def since(self, seq=0, limit=None):
+        """
+        seq 다음 순번부터의 로그 (오래된 순)
+
+        이미 덮어쓴 로그는 건너뛰고 남아 있는 가장 오래된 로그부터 돌려줍니다.
+        """
+        with self._lock:
+            return self._since(seq, limit)
+
+    def wait_since(self, seq, timeout, limit=None):
+        """seq 다음 로그가 생길 때까지 최대 timeout초 대기 (시간 초과면 빈 목록)"""
+        with self._lock:
+            self._appended.wait_for(lambda: self._next_seq - 1 > seq, timeout)
+            return self._since(seq, limit)
+
+    def subscribe(self, delta):
+        with self._lock:
+            self.subscribers += delta
+
+    @property
+    def last_seq(self):
+        """마지막 로그의 순번 (없으면 0)"""
+        return self._next_seq - 1
+
+    def clear(self):
+        """남아 있는 로그 비우기 (순번은 이어서 증가)"""
+        with self._lock:
+            self._first_seq = self._next_seq
+
+    def __len__(self):
+        with self._lock:
+            return self._next_seq - self._oldest_seq()
+
+log_buffer = LogBuffer(LOG_BUFFER_SIZE)
+
 def log_message(message):
     """로그 추가"""
-    task_status['logs'].append({
-        'time': time.strftime('%H:%M:%S'),
-        'message': message
-    })
-    # 최근 100개만 유지
-    if len(task_status['logs']) > 100:
-        task_status['logs'] = task_status['logs'][-100:]
+    log_buffer.append(message)
+    event_notifier.notify()
+
+def iter_friends_rows(csv_reader):
+    """CSV 행을 친구 데이터로 변환 (A: 이름, B: 전화번호, C: 메시지)"""
+    for row in csv_reader:
+        if len(row) >= 2:
+            name = row[0].strip()
+            phone = row[1].strip()
+            message = row[2].strip() if len(row) >= 3 else ""
+            yield {
+                'name': name,
+                'phone': phone,
+                'message': message
+            }
+
+_PHONE_SEPARATORS = re.compile(r'[\s\-\.\(\)/]')
+_MOBILE_PHONE = re.compile(r'^01[016789]\d{7,8}$')
+
+def normalize_phone(phone):
+    """
+    v2.1: 전화번호 정규화
+
+    구분자(공백, -, ., 괄호, /) 제거, +82/82 → 0 변환,
+    시트에서 앞자리 0이 빠진 번호(10xxxxxxxx) 보정 후 휴대폰 번호 형식을 확인합니다.
+
+    Returns:
+        str: 정규화된 번호 (예: 01012345678)
+        None: 휴대폰 번호 형식이 아닌 경우
+    """
+    digits = _PHONE_SEPARATORS.sub('', phone)
+    if digits.startswith('+82'):
+        digits = digits[3:]
+    elif digits.startswith('82') and len(digits) >= 11:
+        digits = digits[2:]
+    elif digits.startswith('+'):
+        return None
+    if not digits.startswith('0'):
+        digits = '0' + digits
+    return digits if _MOBILE_PHONE.match(digits) else None
+
+def iter_response_lines(response, progress=None, chunk_size=64 * 1024):
+    """
+    v2.1: 응답 본문을 청크 단위로 디코딩해 한 줄씩 반환합니다.
+
+    전체 본문(response.text)을 메모리에 올리지 않고, 줄바꿈을 유지해
+    따옴표 안의 여러 줄 셀도 csv.reader가 그대로 처리할 수 있게 합니다.
+
+    Args:
+        progress: 받은 바이트 수를 기록할 dict ('bytes' 키)
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    pending = ''
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        if progress is not None:
+            progress['bytes'] += len(chunk)
+        pending += decoder.decode(chunk)
+        lines = pending.split('\n')
+        pending = lines.pop()
+        for line in lines:
+            yield line + '\n'
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+class InvalidSheetResponse(requests.exceptions.RequestException):
+    """
+    v2.1: 시트 응답이 CSV가 아님 (공유가 해제되면 구글이 로그인 HTML 페이지를 200으로 돌려줌)
+
+    RequestException이므로 접근 실패와 같이 저장된 주소록으로 대체합니다.
+    """
+
+def check_sheet_response(response):
+    """v2.1: CSV 응답인지 확인 (Content-Type) - 아니면 InvalidSheetResponse"""
+    content_type = response.headers.get('Content-Type', '')
+    if not content_type.lower().startswith('text/csv'):
+        raise InvalidSheetResponse(f"CSV가 아닌 응답 ({content_type or 'Content-Type 없음'}) - 시트 공유 설정을 확인하세요")
+
+def iter_sheet_lines(response, progress=None):
+    """
+    v2.1: 시트 응답을 한 줄씩 (iter_response_lines) - 첫 줄이 HTML이면 InvalidSheetResponse
+
+    저장소 반영(sync_rows)은 한 트랜잭션이므로 도중에 예외가 나면 저장된 주소록은 그대로입니다.
+    """
+    lines = iter_response_lines(response, progress)
+    for line in lines:
+        if line.strip():
+            if line.lstrip('\ufeff \t').startswith('<'):
+                raise InvalidSheetResponse("시트 대신 HTML 페이지를 받았습니다 - 시트 공유 설정을 확인하세요")
+            yield line
+            break
+        yield line
+    yield from lines
+
+def track_sync_progress(friends, progress):
+    """v2.1: 수집 중인 행 수를 대시보드(task_state.sync_progress)에 반영"""
+    count = 0
+    for friend in friends:
+        count += 1
+        if count % SYNC_PROGRESS_INTERVAL == 0:
+            progress['rows'] = count
+            task_state.touch()
+            if count % SYNC_LOG_INTERVAL == 0:
+                log_message(f"  ... {count}행 수집 중")
+        yield friend
+    progress['rows'] = count
+    task_state.touch()
+
+class ContactStore:
+    """
+    v2.1: 주소록 로컬 저장소 (SQLite)
+
+    시트 URL별로 파싱된 행을 행 번호(1부터)로 인덱싱해 저장하고,
+    조건부 요청용 ETag/Last-Modified도 함께 보관합니다.
+    범위 조회는 필요한 행만 읽으므로 시트 크기와 무관하게 메모리 사용이 일정합니다.
+    """
+
+    BATCH_SIZE = 1000
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._init_schema()
+
+    def _connect(self):
+        """스레드별 연결 (Flask 요청 스레드와 작업 스레드가 동시에 사용)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._connect()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sheets (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL DEFAULT 0,
+                    row_count INTEGER NOT NULL DEFAULT 0,
+                    inserted INTEGER NOT NULL DEFAULT 0,
+                    updated INTEGER NOT NULL DEFAULT 0,
+                    deleted INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS contacts (
+                    sheet_url TEXT NOT NULL,
+                    row_num INTEGER NOT NULL,
+                    name TEXT NOT NULL,
+                    phone TEXT NOT NULL,
+                    message TEXT NOT NULL,
+                    fingerprint TEXT,
+                    phone_norm TEXT,
+                    status TEXT NOT NULL DEFAULT 'ok',
+                    PRIMARY KEY (sheet_url, row_num)
+                ) WITHOUT ROWID
+            """)
+            # v2.1: 이전 버전 DB 마이그레이션 (변경분 동기화 컬럼)
+            self._ensure_column(conn, 'sheets', 'inserted', "INTEGER NOT NULL DEFAULT 0")
+            self._ensure_column(conn, 'sheets', 'updated', "INTEGER NOT NULL DEFAULT 0")
+            self._ensure_column(conn, 'sheets', 'deleted', "INTEGER NOT NULL DEFAULT 0")
+            self._ensure_column(conn, 'contacts', 'fingerprint', "TEXT")
+
+            # v2.1: 전화번호 정규화/검증 컬럼 - 기존 행은 한 번에 정규화
+            added = self._ensure_column(conn, 'contacts', 'phone_norm', "TEXT")
+            self._ensure_column(conn, 'contacts', 'status', "TEXT NOT NULL DEFAULT 'ok'")
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS contacts_phone_norm
+                ON contacts (sheet_url, phone_norm)
+            """)
+            if added:
+                conn.create_function('normalize_phone', 1, normalize_phone)
+                conn.execute("UPDATE contacts SET phone_norm = normalize_phone(phone)")
+                for r in conn.execute("SELECT url FROM sheets").fetchall():
+                    self._update_status(conn, r['url'])
+
+            # v2.1: 처리 완료 기록 (전화번호 기준 중복 방지)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS processed (
+                    phone TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    outcome TEXT NOT NULL,
+                    processed_at REAL NOT NULL,
+                    sheet_url TEXT,
+                    row_num INTEGER
+                ) WITHOUT ROWID
+            """)
+
+    @staticmethod
+    def _ensure_column(conn, table, column, declaration):
+        """컬럼이 없으면 추가 (추가했으면 True)"""
+        columns = [r['name'] for r in conn.execute(f"PRAGMA table_info({table})")]
+        if column not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+            return True
+        return False
+
+    @staticmethod
+    def _update_status(conn, sheet_url):
+        """
+        v2.1: 시트 전체 행의 검증 상태를 한 번에 갱신
+
+        invalid: 휴대폰 번호 형식이 아님
+        duplicate: 앞쪽 행에 같은 번호가 있음 (첫 행만 ok)
+        """
+        conn.execute("""
+            UPDATE contacts SET status = CASE
+                WHEN phone_norm IS NULL THEN 'invalid'
+                WHEN EXISTS (
+                    SELECT 1 FROM contacts c
+                    WHERE c.sheet_url = contacts.sheet_url
+                      AND c.phone_norm = contacts.phone_norm
+                      AND c.row_num < contacts.row_num
+                ) THEN 'duplicate'
+                ELSE 'ok'
+            END
+            WHERE sheet_url = ?
+        """, (sheet_url,))
+
+    def get_sheet(self, sheet_url):
+        """시트 메타데이터 조회 (없으면 None)"""
+        row = self._connect().execute(
+            "SELECT * FROM sheets WHERE url = ?", (sheet_url,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def touch_sheet(self, sheet_url):
+        """변경 없음(304) 확인 시각 갱신 - 마지막 변경분은 0건으로 기록"""
+        conn = self._connect()
+        with conn:
+            conn.execute("""
+                UPDATE sheets SET fetched_at = ?, inserted = 0, updated = 0, deleted = 0
+                WHERE url = ?
+            """, (time.time(), sheet_url))
+
+    @staticmethod
+    def fingerprint(friend):
+        """행 지문 (이름+전화번호+메시지 해시)"""
+        key = '\x1f'.join((friend['name'], friend['phone'], friend['message']))
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def sync_rows(self, sheet_url, friends, etag=None, last_modified=None):
+        """
+        v2.1: 새로 받은 행과 저장된 행을 비교해 변경분만 반영합니다 (단일 트랜잭션).
+
+        행은 행 번호로 식별하며, 같은 번호의 지문이 다르면 변경으로 봅니다.
+        새 행은 임시 테이블에 배치 단위로 기록한 뒤 SQL로 비교하므로
+        시트 크기와 무관하게 메모리 사용이 일정합니다.
+
+        Args:
+            friends: 친구 데이터 iterable (generator 권장)
+
+        Returns:
+            dict: {'total', 'inserted', 'updated', 'deleted'}
+        """
+        conn = self._connect()
+        row_count = 0
+        with conn:
+            conn.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS incoming (
+                    row_num INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    phone TEXT NOT NULL,
+                    message TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    phone_norm TEXT
+                )
+            """)
+            conn.execute("DELETE FROM incoming")
+
+            batch = []
+            for friend in friends:
+                row_count += 1
+                batch.append((row_count, friend['name'], friend['phone'],
+                              friend['message'], self.fingerprint(friend),
+                              normalize_phone(friend['phone'])))
+                if len(batch) >= self.BATCH_SIZE:
+                    conn.executemany(
+                        "INSERT INTO incoming VALUES (?, ?, ?, ?, ?, ?)", batch)
+                    batch = []
+            if batch:
+                conn.executemany(
+                    "INSERT INTO incoming VALUES (?, ?, ?, ?, ?, ?)", batch)
+
+            # 변경: 같은 행 번호, 다른 지문
+            updated = conn.execute("""
+                UPDATE contacts
+                SET (name, phone, message, fingerprint, phone_norm) = (
+                    SELECT i.name, i.phone, i.message, i.fingerprint, i.phone_norm
+                    FROM incoming i WHERE i.row_num = contacts.row_num
+                )
+                WHERE sheet_url = ? AND EXISTS (
+                    SELECT 1 FROM incoming i
+                    WHERE i.row_num = contacts.row_num
+                      AND i.fingerprint IS NOT contacts.fingerprint
+                )
+            """, (sheet_url,)).rowcount
+
+            # 추가: 저장소에 없는 행 번호
+            inserted = conn.execute("""
+                INSERT INTO contacts (sheet_url, row_num, name, phone, message, fingerprint, phone_norm)
+                SELECT ?, i.row_num, i.name, i.phone, i.message, i.fingerprint, i.phone_norm
+                FROM incoming i
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM contacts c
+                    WHERE c.sheet_url = ? AND c.row_num = i.row_num
+                )
+            """, (sheet_url, sheet_url)).rowcount
+
+            # 삭제: 새 시트보다 뒤에 있는 행
+            deleted = conn.execute(
+                "DELETE FROM contacts WHERE sheet_url = ? AND row_num > ?",
+                (sheet_url, row_count)
+            ).rowcount
+
+            # v2.1: 번호 검증/시트 내 중복 표시 (변경이 있을 때만)
+            if inserted or updated or deleted:
+                self._update_status(conn, sheet_url)
+
+            conn.execute("DELETE FROM incoming")
+            conn.execute("""
+                INSERT OR REPLACE INTO sheets
+                    (url, etag, last_modified, fetched_at, row_count, inserted, updated, deleted)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (sheet_url, etag, last_modified, time.time(), row_count,
+                  inserted, updated, deleted))
+
+        return {
+            'total': row_count,
+            'inserted': inserted,
+            'updated': updated,
+            'deleted': deleted
+        }
+
+    def get_sync_result(self, sheet_url):
+        """마지막 동기화 결과 (없으면 None)"""
+        sheet = self.get_sheet(sheet_url)
+        if not sheet:
+            return None
+        return {
+            'total': sheet['row_count'],
+            'inserted': sheet['inserted'],
+            'updated': sheet['updated'],
+            'deleted': sheet['deleted'],
+            'fetched_at': sheet['fetched_at']
+        }
+
+    @staticmethod
+    def _to_friend(r):
+        return {
+            'row': r['row_num'],
+            'name': r['name'],
+            'phone': r['phone'],
+            'message': r['message'],
+            'phone_norm': r['phone_norm'],
+            'status': r['status']
+        }
+
+    def count(self, sheet_url):
+        """저장된 행 수"""
+        sheet = self.get_sheet(sheet_url)
+        return sheet['row_count'] if sheet else 0
+
+    def get_range(self, sheet_url, start, end):
+        """
+        행 번호 범위 조회 (start, end 포함, 1부터 시작)
+
+        Returns:
+            list: [{'row', 'name', 'phone', 'message', 'phone_norm', 'status'}, ...]
+        """
+        rows = self._connect().execute("""
+            SELECT row_num, name, phone, message, phone_norm, status FROM contacts
+            WHERE sheet_url = ? AND row_num BETWEEN ? AND ?
+            ORDER BY row_num
+        """, (sheet_url, start, end)).fetchall()
+        return [self._to_friend(r) for r in rows]
+
+    def query(self, sheet_url, offset=0, limit=FRIENDS_PAGE_SIZE, search=None, start=None, end=None):
+        """
+        v2.1: 페이지 단위 조회 (검색/행 범위 필터)
+
+        Args:
+            offset, limit: 필터 결과 내 페이지 위치
+            search: 이름 또는 전화번호 부분 일치
+            start, end: 행 번호 범위 (포함)
+
+        Returns:
+            tuple: (행 목록, 필터에 맞는 전체 행 수)
+        """
+        where = ["sheet_url = ?"]
+        params = [sheet_url]
+        if start is not None:
+            where.append("row_num >= ?")
+            params.append(start)
+        if end is not None:
+            where.append("row_num <= ?")
+            params.append(end)
+        if search:
+            escaped = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            pattern = f"%{escaped}%"
+            conditions = ["name LIKE ? ESCAPE '\\'", "phone LIKE ? ESCAPE '\\'"]
+            params.extend([pattern, pattern])
+            # 시트 표기(010-1234-5678, +82 10 ...)와 달라도 정규화된 번호로 찾음
+            if any(ch.isdigit() for ch in search):
+                phone_term = normalize_phone(search) or re.sub(r'\D', '', search)
+                conditions.append("phone_norm LIKE ?")
+                params.append(f"%{phone_term}%")
+            where.append(f"({' OR '.join(conditions)})")
+        clause = " AND ".join(where)
+
+        conn = self._connect()
+        matched = conn.execute(
+            f"SELECT COUNT(*) FROM contacts WHERE {clause}", params
+        ).fetchone()[0]
+        rows = conn.execute(f"""
+            SELECT row_num, name, phone, message, phone_norm, status FROM contacts
+            WHERE {clause}
+            ORDER BY row_num
+            LIMIT ? OFFSET ?
+        """, params + [limit, offset]).fetchall()
+        return [self._to_friend(r) for r in rows], matched
+
+    def validation_report(self, sheet_url, sample_size=VALIDATION_SAMPLE_SIZE):
+        """
+        v2.1: 전화번호 검증 결과
+
+        Returns:
+            dict: {'counts': {'ok', 'invalid', 'duplicate'}, 'invalid': [...], 'duplicate': [...]}
+                  invalid/duplicate 목록은 앞쪽 sample_size개만
+        """
+        conn = self._connect()
+        counts = {'ok': 0, 'invalid': 0, 'duplicate': 0}
+        for r in conn.execute("""
+            SELECT status, COUNT(*) AS count FROM contacts
+            WHERE sheet_url = ? GROUP BY status
+        """, (sheet_url,)):
+            counts[r['status']] = r['count']
+
+        report = {'counts': counts}
+        for status in ('invalid', 'duplicate'):
+            rows = conn.execute("""
+                SELECT row_num, name, phone, message, phone_norm, status FROM contacts
+                WHERE sheet_url = ? AND status = ?
+                ORDER BY row_num LIMIT ?
+            """, (sheet_url, status, sample_size)).fetchall()
+            report[status] = [self._to_friend(r) for r in rows]
+        return report
+
+    def get_processed(self, phone):
+        """
+        v2.1: 처리 기록 조회 (기본 키 조회)
+
+        Returns:
+            dict: {'phone', 'name', 'outcome', 'processed_at', 'sheet_url', 'row_num'}
+            None: 처리한 적 없는 번호
+        """
+        row = self._connect().execute(
+            "SELECT * FROM processed WHERE phone = ?", (phone,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def record_processed(self, friend, outcome, sheet_url=None):
+        """v2.1: 처리 결과 기록 (같은 번호는 최신 결과로 갱신)"""
+        conn = self._connect()
+        with conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO processed
+                    (phone, name, outcome, processed_at, sheet_url, row_num)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (friend['phone'], friend['name'], outcome, time.time(),
+                  sheet_url, friend.get('row')))
+
+    def processed_stats(self):
+        """v2.1: 처리 결과별 건수"""
+        rows = self._connect().execute(
+            "SELECT outcome, COUNT(*) AS count FROM processed GROUP BY outcome"
+        ).fetchall()
+        return {r['outcome']: r['count'] for r in rows}
+
+    def clear_processed(self):
+        """v2.1: 처리 기록 전체 삭제"""
+        conn = self._connect()
+        with conn:
+            return conn.execute("DELETE FROM processed").rowcount
+
+contact_store = ContactStore(CONTACT_DB_FILE)
+
+class JobCheckpoint:
+    """
+    v2.1: 작업 체크포인트 (append-only JSON Lines, 기록마다 fsync)
+
+    새 작업을 시작하면 파일을 새로 만들고, 이후에는 행마다 결과를 덧붙이기만 합니다.
+    프로세스가 죽어도 마지막으로 기록된 행까지는 남아 있으므로
+    다음 미완료 행부터 이어서 진행할 수 있습니다.
+
+    작업 기록에는 그 작업의 대상 행 목록과 지문도 저장합니다. 이어서 할 때는 저장소가 아니라
+    이 목록을 사용하므로, 그 사이 시트가 바뀌어도 행 번호가 다른 연락처를 가리키지 않습니다.
+
+    기록 형식:
+        {"type": "job", "job_id", "sheet_url", "start", "end", "delay_min", "delay_max", "skip_processed",
+         "rows": [{"row", "name", "phone", "message", "phone_norm", "status"}, ...], "fingerprint"}
+        {"type": "row", "row", "outcome"}       # outcome: success / fail / skip
+        {"type": "resume", "row"}
+        {"type": "stopped"} / {"type": "done"}
+    """
+
+    ROW_FIELDS = ('row', 'name', 'phone', 'message', 'phone_norm', 'status')
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def _append(self, record):
+        record['time'] = time.time()
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    @staticmethod
+    def rows_fingerprint(rows):
+        """작업 행 목록 지문 (행 번호 + 행 지문)"""
+        key = '\n'.join(f"{friend['row']}:{ContactStore.fingerprint(friend)}" for friend in rows)
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def begin(self, job, rows):
+        """새 작업 시작 (이전 체크포인트는 버림) - rows: 작업 대상 행 목록"""
+        self.close()
+        self._file = open(self.path, 'w', encoding='utf-8')
+        record = {'type': 'job', 'job_id': time.strftime('%Y%m%d-%H%M%S')}
+        record.update(job)
+        record['rows'] = [{key: friend[key] for key in self.ROW_FIELDS} for friend in rows]
+        record['fingerprint'] = self.rows_fingerprint(record['rows'])
+        self._append(record)
+
+    def resume(self, row):
+        """기존 작업 이어서 기록"""
+        self.close()
+        self._file = open(self.path, 'a', encoding='utf-8')
+        # 기록 도중 종료되어 줄이 끊겨 있으면 새 줄에서 이어 씀
+        if self._file.tell() > 0:
+            with open(self.path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    self._file.write('\n')
+        self._append({'type': 'resume', 'row': row})
+
+    def record_row(self, row, outcome):
+        if self._file:
+            self._append({'type': 'row', 'row': row, 'outcome': outcome})
+
+    def finish(self, completed):
+        """작업 종료 기록 (completed=False면 중단 - 이어서 하기 가능)"""
+        if self._file:
+            self._append({'type': 'done' if completed else 'stopped'})
+        self.close()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def load_last_job(self):
+        """
+        마지막 작업 상태 읽기
+
+        Returns:
+            dict: 작업 정보 + {'last_row', 'outcomes', 'completed', 'next_row'}
+                  rows는 지문이 맞지 않거나 없으면(이전 형식) None
+            None: 체크포인트가 없는 경우
+        """
+        if not os.path.exists(self.path):
+            return None
+
+        job = None
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 기록 도중 종료된 마지막 줄
+                    continue
+
+                if record.get('type') == 'job':
+                    job = dict(record, last_row=record['start'] - 1,
+                               outcomes={}, completed=False)
+                elif job is None:
+                    continue
+                elif record['type'] == 'row':
+                    job['last_row'] = max(job['last_row'], record['row'])
+                    outcome = record['outcome']
+                    job['outcomes'][outcome] = job['outcomes'].get(outcome, 0) + 1
+                elif record['type'] == 'done':
+                    job['completed'] = True
+
+        if job:
+            job['next_row'] = job['last_row'] + 1
+            rows = job.get('rows')
+            if rows is not None and self.rows_fingerprint(rows) != job.get('fingerprint'):
+                rows = None
+            job['rows'] = rows
+        return job
+
+job_checkpoint = JobCheckpoint(CHECKPOINT_FILE)
 
 def read_friends_data(sheet_url=None):
-    """구글 시트에서 친구 데이터 읽기"""
+    """
+    구글 시트에서 친구 데이터를 읽어 로컬 저장소(contact_store)에 반영
+
+    v2.1: 저장된 ETag/Last-Modified로 조건부 요청을 보내고,
+    304 응답이나 네트워크 오류(시간 초과 등) 시 저장된 데이터를 그대로 사용합니다.
+    행 조회는 contact_store.get_range()로 합니다.
+
+    Returns:
+        int: 저장소의 행 수
+        None: 데이터를 읽을 수 없는 경우
+    """
     if sheet_url is None:
         sheet_url = GOOGLE_SHEET_URL
 
-    friends = []
+    cached = contact_store.get_sheet(sheet_url)
+    headers = {}
+    if cached:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+
+    progress = {'state': 'downloading', 'rows': 0, 'bytes': 0}
+    task_state.update(sync_progress=progress)
+
     try:
         # 구글 시트에서 CSV 다운로드
+        # v2.1: stream=True - 본문을 받는 대로 파싱해 저장소에 기록
         log_message("📥 구글 시트에서 데이터 불러오는 중...")
-        response = requests.get(sheet_url, timeout=10)
-        response.raise_for_status()
-
-        # UTF-8 인코딩 명시
-        response.encoding = 'utf-8'
-
-        # CSV 파싱
-        csv_data = StringIO(response.text)
-        csv_reader = csv.reader(csv_data)
-
-        for row in csv_reader:
-            if len(row) >= 2:
-                name = row[0].strip()
-                phone = row[1].strip()
-                message = row[2].strip() if len(row) >= 3 else ""
-                friends.append({
-                    'name': name,
-                    'phone': phone,
-                    'message': message
-                })
-
-        log_message(f"✓ {len(friends)}명의 데이터 로드 완료")
-        return friends
+        with http_session.get(sheet_url, 'sheet', headers=headers, stream=True) as response:
+            # v2.1: 변경 없음 → 저장된 데이터 사용
+            if response.status_code == 304 and cached:
+                contact_store.touch_sheet(sheet_url)
+                progress.update(state='done', rows=cached['row_count'])
+                log_message(f"✓ 변경 없음 - 저장된 {cached['row_count']}명 사용")
+                return cached['row_count']
+
+            response.raise_for_status()
+            check_sheet_response(response)
+
+            # CSV 파싱 → 저장소 기록 (UTF-8)
+            # v2.1: 변경분만 반영
+            csv_reader = csv.reader(iter_sheet_lines(response, progress))
+            result = contact_store.sync_rows(
+                sheet_url,
+                track_sync_progress(iter_friends_rows(csv_reader), progress),
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified')
+            )
+
+        progress['state'] = 'done'
+        log_message(f"✓ {result['total']}명의 데이터 로드 완료 "
+                    f"(추가 {result['inserted']}, 변경 {result['updated']}, 삭제 {result['deleted']})")
+        return result['total']
 
     except requests.exceptions.RequestException as e:
+        progress['state'] = 'error'
         log_message(f"✗ 구글 시트 접근 실패: {e}")
+
+        # v2.1: 저장된 데이터 fallback
+        if cached:
+            log_message(f"📦 저장된 데이터 사용: {cached['row_count']}명")
+            return cached['row_count']
+
         # 로컬 CSV 파일 fallback
         try:
             log_message("📂 로컬 CSV 파일 시도...")
             with open('kakao_friends_full.csv', 'r', encoding='utf-8') as f:
-                csv_reader = csv.reader(f)
-                for row in csv_reader:
-                    if len(row) >= 2:
-                        name = row[0].strip()
-                        phone = row[1].strip()
-                        message = row[2].strip() if len(row) >= 3 else ""
-                        friends.append({
-                            'name': name,
-                            'phone': phone,
-                            'message': message
-                        })
-            log_message(f"✓ 로컬 파일에서 {len(friends)}명 로드")
-            return friends
+                total = contact_store.sync_rows(
+                    sheet_url, iter_friends_rows(csv.reader(f)))['total']
+            progress.update(state='done', rows=total)
+            log_message(f"✓ 로컬 파일에서 {total}명 로드")
+            return total
         except FileNotFoundError:
             log_message("✗ 로컬 CSV 파일도 없음")
             return None
     except Exception as e:
+        progress['state'] = 'error'
         log_message(f"✗ 데이터 읽기 실패: {e}")
         return None
 
+def read_friends_range(sheet_url, start, end):
+    """
+    v2.1: 작업 범위(start~end행)의 친구 데이터만 읽기
+
+    1) 저장소가 최근(JOB_SHEET_MAX_AGE초 이내)에 동기화됐으면 인덱스로 범위만 조회
+    2) 아니면 시트를 스트리밍으로 읽다가 end행을 지나면 바로 중단
+       (조건부 요청이 304면 저장소 사용, 저장소는 부분 데이터로 갱신하지 않음)
+
+    시트 내 중복 판정을 위해 1~end행의 번호는 확인하지만,
+    end 이후 행은 내려받지도 파싱하지도 않습니다.
+
+    Returns:
+        list: [{'row', 'name', 'phone', 'message', 'phone_norm', 'status'}, ...]
+        None: 데이터를 읽을 수 없는 경우
+    """
+    cached = contact_store.get_sheet(sheet_url)
+    if cached and time.time() - cached['fetched_at'] < JOB_SHEET_MAX_AGE:
+        log_message("✓ 최근 동기화된 주소록에서 범위 조회")
+        return contact_store.get_range(sheet_url, start, end)
+
+    headers = {}
+    if cached:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+
+    try:
+        log_message(f"📥 구글 시트에서 {end}행까지만 불러오는 중...")
+        with http_session.get(sheet_url, 'sheet', headers=headers, stream=True) as response:
+            if response.status_code == 304 and cached:
+                contact_store.touch_sheet(sheet_url)
+                log_message("✓ 변경 없음 - 저장된 주소록에서 범위 조회")
+                return contact_store.get_range(sheet_url, start, end)
+
+            response.raise_for_status()
+            check_sheet_response(response)
+
+            csv_reader = csv.reader(iter_sheet_lines(response))
+            friends = []
+            seen_phones = set()
+            for row_num, friend in enumerate(itertools.islice(iter_friends_rows(csv_reader), end), 1):
+                phone_norm = normalize_phone(friend['phone'])
+                if phone_norm is None:
+                    status = 'invalid'
+                elif phone_norm in seen_phones:
+                    status = 'duplicate'
+                else:
+                    status = 'ok'
+                    seen_phones.add(phone_norm)
+
+                if row_num >= start:
+                    friend.update(row=row_num, phone_norm=phone_norm, status=status)
+                    friends.append(friend)
+
+        log_message(f"✓ {len(friends)}명의 데이터 로드 완료")
+        return friends
+
+    except requests.exceptions.RequestException as e:
+        log_message(f"✗ 구글 시트 접근 실패: {e}")
+        if cached:
+            log_message("📦 저장된 주소록에서 범위 조회")
+            return contact_store.get_range(sheet_url, start, end)
+
+        # 저장된 주소록이 없으면 기존 방식(로컬 CSV 포함)으로 전체 읽기
+        if read_friends_data(sheet_url):
+            return contact_store.get_range(sheet_url, start, end)
+        return None
+    except Exception as e:
+        log_message(f"✗ 데이터 읽기 실패: {e}")
+        return None
+
+_main_window_cache = {'hwnd': None, 'pid': None}
+_main_window_lock = threading.Lock()
+
+def is_kakao_title(title):
+    """v2.1: 카카오톡 창 제목인지"""
+    return '카카오톡' in title or 'KakaoTalk' in title or 'kakao' in title.lower()
+
 def find_main_kakao_window():
-    """메인 카카오톡 창 찾기"""
-    all_windows = gw.getAllWindows()
+    """
+    메인 카카오톡 창 찾기
+
+    v2.1: 찾은 창의 HWND와 프로세스 ID를 기억해 두고, 다음에는 IsWindow/프로세스/제목만
+    확인합니다. 확인에 실패할 때만 전체 창 목록을 다시 열거합니다.
+    """
+    backend = screen_backend.get_backend()
+
+    with _main_window_lock:
+        hwnd, pid = _main_window_cache['hwnd'], _main_window_cache['pid']
+    if hwnd is not None:
+        try:
+            if (backend.is_window(hwnd) and backend.window_pid(hwnd) == pid
+                    and is_kakao_title(backend.window_title(hwnd))):
+                return backend.window_from_handle(hwnd)
+        except Exception:
+            pass
+
+    window = enumerate_main_kakao_window(backend)
+    with _main_window_lock:
+        if window is None:
+            _main_window_cache['hwnd'] = _main_window_cache['pid'] = None
+        else:
+            _main_window_cache['hwnd'] = window._hWnd
+            try:
+                _main_window_cache['pid'] = backend.window_pid(window._hWnd)
+            except Exception:
+                _main_window_cache['hwnd'] = None
+    return window
+
+def enumerate_main_kakao_window(backend):
+    """전체 창 목록에서 메인 카카오톡 창 찾기"""
+    all_windows = backend.get_all_windows()
     kakao_candidates = []
 
     for window in all_windows:
@@ -145,7 +1146,7 @@ def find_main_kakao_window():
         if not title.strip():
             continue
 
-        if '카카오톡' in title or 'KakaoTalk' in title or 'kakao' in title.lower():
+        if is_kakao_title(title):
             is_main = (title == "카카오톡" or title == "KakaoTalk" or len(title) < 20)
             kakao_candidates.append({
                 'window': window,
@@ -162,26 +1163,87 @@ def find_main_kakao_window():
 
     return kakao_candidates[0]['window']
 
+_activation_counts = {'fast': 0, 'activate': 0, 'ladder': 0, 'failed': 0}
+_activation_lock = threading.Lock()
+
+def record_activation(level):
+    """v2.1: 창 활성화 단계별 횟수 (fast / activate / ladder / failed)"""
+    with _activation_lock:
+        _activation_counts[level] += 1
+
+def get_activation_counts():
+    with _activation_lock:
+        return dict(_activation_counts)
+
+def reset_activation_counts():
+    with _activation_lock:
+        for level in _activation_counts:
+            _activation_counts[level] = 0
+
+def is_window_in_front(window):
+    """
+    v2.1: 창이 이미 포그라운드이고 최소화되지 않았는지
+
+    Returns:
+        bool, 또는 포그라운드 창을 알 수 없는 백엔드면 None
+    """
+    foreground = screen_backend.get_backend().foreground_window()
+    if foreground is None:
+        return None
+    if foreground[0] != window._hWnd or window.isMinimized:
+        return False
+    # 최소화된 창은 (-32000, -32000) 위치
+    return window.width > 0 and window.height > 0 and window.left > -32000
+
+def wait_until_in_front(window, timeout=ACTIVATE_CHECK_TIMEOUT):
+    """v2.1: 창이 포그라운드가 될 때까지 잠깐 대기"""
+    deadline = time.perf_counter() + timeout
+    while True:
+        in_front = is_window_in_front(window)
+        if in_front or in_front is None or time.perf_counter() >= deadline:
+            return bool(in_front)
+        time.sleep(0.05)
+
 def activate_window(window, silent=False):
     """
     v2.0: 창을 최상단으로 강제로 가져옵니다 (Windows API 사용)
 
+    v2.1: 이미 포그라운드면 바로 반환하고, activate() 한 번으로 안 될 때만
+    기존 방식(여러 번 activate, maximize/restore, TOPMOST)을 사용합니다.
+
     Args:
         window: 활성화할 창
         silent: True면 로그를 출력하지 않음
     """
+    backend = screen_backend.get_backend()
+
     try:
+        # v2.1: 빠른 경로 - 이미 맨 앞
+        if is_window_in_front(window):
+            record_activation('fast')
+            return True
+
         # 최소화되어 있으면 복원
         if window.isMinimized:
             if not silent:
                 log_message("최소화된 창 복원 중...")
             try:
-                hwnd = window._hWnd
-                win32gui.ShowWindow(hwnd, win32con.SW_RESTORE)
+                backend.restore_window(window)
                 time.sleep(1.0)
             except:
                 pass
 
+        # v2.1: activate() 한 번 후 확인
+        try:
+            window.activate()
+        except:
+            pass
+        if wait_until_in_front(window):
+            record_activation('activate')
+            if not silent:
+                log_message("✓ 창 활성화 완료!")
+            return True
+
         # 창 활성화 (여러 번 강력하게 시도)
         if not silent:
             log_message("창 활성화 시도 (5회 강력하게)...")
@@ -210,12 +1272,9 @@ def activate_window(window, silent=False):
 
         # v2.0: 최상위 고정 시도 (Windows API 사용)
         try:
-            hwnd = window._hWnd
-            win32gui.SetWindowPos(hwnd, win32con.HWND_TOPMOST, 0, 0, 0, 0,
-                                 win32con.SWP_NOMOVE | win32con.SWP_NOSIZE)
+            backend.set_topmost(window, True)
             time.sleep(0.2)
-            win32gui.SetWindowPos(hwnd, win32con.HWND_NOTOPMOST, 0, 0, 0, 0,
-                                 win32con.SWP_NOMOVE | win32con.SWP_NOSIZE)
+            backend.set_topmost(window, False)
         except:
             pass
 
@@ -226,6 +1285,10 @@ def activate_window(window, silent=False):
         except:
             pass
 
+        record_activation('ladder')
+        if is_window_in_front(window) is False:
+            record_activation('failed')
+
         if not silent:
             log_message("✓ 창 활성화 완료!")
         return True
@@ -235,71 +1298,551 @@ def activate_window(window, silent=False):
             log_message(f"✗ 창 활성화 실패: {e}")
         return False
 
+def load_image_gray(path):
+    """v2.1: 이미지를 회색조로 로드 (한글 경로 지원 - cv2.imread 대신 imdecode)"""
+    import cv2
+    import numpy as np
+
+    data = np.fromfile(path, dtype=np.uint8)
+    return cv2.imdecode(data, cv2.IMREAD_GRAYSCALE)
+
+def capture_screen_gray(region=None):
+    """
+    v2.1: 화면 캡처 (회색조 NumPy 배열)
+
+    Args:
+        region: (left, top, width, height) - None이면 전체 화면
+    """
+    return screen_backend.get_backend().capture_gray(region)
+
+def scale_image(image, scale):
+    """v2.1: 이미지 배율 변경 (확대는 선형 보간, 축소는 영역 평균)"""
+    if scale == 1.0:
+        return image
+    import cv2
+
+    interpolation = cv2.INTER_LINEAR if scale > 1.0 else cv2.INTER_AREA
+    return cv2.resize(image, None, fx=scale, fy=scale, interpolation=interpolation)
+
+class TemplateLibrary:
+    """
+    v2.1: UI 템플릿 저장소
+
+    처음 사용할 때 템플릿 이미지를 모두 회색조로 디코딩하고 배율별 사본(ICON_SCALES)까지
+    미리 만들어 메모리에 둡니다. 인식할 때마다 파일을 읽거나 크기를 바꾸지 않습니다.
+    (임포트할 때 cv2를 불러오지 않도록 로드는 ensure_loaded()까지 미룹니다)
+    """
+
+    def __init__(self, files, scales=ICON_SCALES):
+        self.files = files
+        self.scales = list(scales)
+        self._variants = None  # name -> {scale: 회색조 배열}, 로드 전에는 None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def load(self):
+        """템플릿 파일 로드 (없거나 읽을 수 없는 파일은 건너뜀)"""
+        variants = {}
+        for name, path in self.files.items():
+            if not os.path.exists(path):
+                continue
+            image = load_image_gray(path)
+            if image is None:
+                continue
+            variants[name] = {scale: scale_image(image, scale) for scale in self.scales}
+        with self._lock:
+            self._variants = variants
+        return list(variants)
+
+    def ensure_loaded(self):
+        """아직 로드하지 않았으면 로드 (여러 스레드가 동시에 불러도 한 번만)"""
+        variants = self._variants
+        if variants is None:
+            with self._load_lock:
+                if self._variants is None:
+                    self.load()
+                variants = self._variants
+        return variants
+
+    def has(self, name):
+        return name in self.ensure_loaded()
+
+    def names(self):
+        return list(self.ensure_loaded())
+
+    def get(self, name):
+        """원본 크기 회색조 템플릿 (없으면 None)"""
+        return self.variants(name, [1.0])[0][1] if self.has(name) else None
+
+    def variants(self, name, scales=None):
+        """
+        배율별 템플릿 [(scale, 배열), ...] - scales 순서대로
+
+        미리 만들지 않은 배율은 처음 요청할 때 만들어 보관합니다.
+        """
+        by_scale = self.ensure_loaded().get(name)
+        if by_scale is None:
+            return []
+
+        result = []
+        for scale in (self.scales if scales is None else scales):
+            image = by_scale.get(scale)
+            if image is None:
+                with self._lock:
+                    image = by_scale.setdefault(scale, scale_image(by_scale[1.0], scale))
+            result.append((scale, image))
+        return result
+
+template_library = TemplateLibrary(TEMPLATE_FILES)
+
+def match_template_multiscale(screen, variants, stop_score=None):
+    """
+    v2.1: 배율별로 matchTemplate을 한 번씩 계산해 가장 높은 점수의 위치를 찾습니다.
+
+    Args:
+        variants: [(scale, 회색조 템플릿), ...] - TemplateLibrary.variants() 결과
+        stop_score: 이 점수 이상이면 나머지 배율은 건너뜀
+
+    Returns:
+        dict: {'score', 'x', 'y' (캡처 이미지 기준 중심 좌표), 'scale', 'width', 'height'}
+        None: 템플릿이 캡처보다 커서 비교할 수 없는 경우
+    """
+    import cv2
+
+    best = None
+    for scale, scaled in variants:
+        height, width = scaled.shape[:2]
+        if height > screen.shape[0] or width > screen.shape[1]:
+            continue
+
+        response = cv2.matchTemplate(screen, scaled, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (left, top) = cv2.minMaxLoc(response)
+
+        if best is None or score > best['score']:
+            best = {
+                'score': float(score),
+                'x': left + width // 2,
+                'y': top + height // 2,
+                'scale': scale,
+                'width': width,
+                'height': height
+            }
+        if stop_score is not None and score >= stop_score:
+            break
+    return best
+
+def get_icon_search_region(window):
+    """
+    v2.1: 아이콘 검색 영역 (화면 좌표)
+
+    설정 파일의 icon_search_region([x, y, width, height], 창 기준)이 있으면 창 안의
+    그 부분만, 없으면 창 전체를 검색합니다. 주 모니터 밖으로 나간 부분은 잘라냅니다.
+
+    Returns:
+        tuple: (left, top, width, height)
+        None: 검색할 영역이 화면에 없는 경우
+    """
+    left, top, width, height = window.left, window.top, window.width, window.height
+
+    sub_region = load_config().get('icon_search_region')
+    if sub_region:
+        x, y, sub_width, sub_height = (int(v) for v in sub_region)
+        left += x
+        top += y
+        width = min(sub_width, width - x)
+        height = min(sub_height, height - y)
+
+    screen_width, screen_height = screen_backend.get_backend().screen_size()
+    right = min(left + width, screen_width)
+    bottom = min(top + height, screen_height)
+    left = max(left, 0)
+    top = max(top, 0)
+
+    if right <= left or bottom <= top:
+        return None
+    return (left, top, right - left, bottom - top)
+
+def locate_icon(variants, region=None):
+    """
+    v2.1: 지정 영역(없으면 전체 화면)만 캡처해서 아이콘 검색
+
+    Returns:
+        dict: match_template_multiscale 결과 (x, y는 화면 좌표) + 'elapsed_ms'
+        None: 비교할 수 없는 경우
+    """
+    started = time.perf_counter()
+    screen = capture_screen_gray(region)
+    match = match_template_multiscale(screen, variants, stop_score=ICON_CONFIDENCES[0])
+    if match is None:
+        return None
+
+    if region:
+        match['x'] += region[0]
+        match['y'] += region[1]
+    match['elapsed_ms'] = (time.perf_counter() - started) * 1000
+    return match
+
+def get_icon_cache_key(window):
+    """v2.1: 아이콘 캐시 키 - 창 크기, DPI, 카톡 버전"""
+    backend = screen_backend.get_backend()
+    return f"{window.width}x{window.height}@{backend.window_dpi(window)}dpi/{backend.window_exe_version(window)}"
+
+def load_icon_cache():
+    """v2.1: 아이콘 위치 캐시 로드"""
+    if os.path.exists(ICON_CACHE_FILE):
+        try:
+            with open(ICON_CACHE_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    return {}
+
+def save_icon_cache(key, location):
+    """v2.1: 찾은 아이콘 위치를 캐시에 저장"""
+    cache = load_icon_cache()
+    cache[key] = {
+        'offset_x': location['offset_x'],
+        'offset_y': location['offset_y'],
+        'scale': location['scale'],
+        'score': location['score'],
+        'saved_at': time.time()
+    }
+    try:
+        with open(ICON_CACHE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False, indent=2)
+    except OSError as e:
+        log_message(f"⚠ 아이콘 캐시 저장 실패: {e}")
+
+def verify_cached_icon(window, cached):
+    """
+    v2.1: 캐시된 위치 주변의 작은 영역만 캡처해서 아이콘이 그대로 있는지 확인
+
+    Returns:
+        dict: locate_icon 결과 (작은 위치 변화는 보정됨)
+        None: 아이콘이 캐시 위치에 없는 경우
+    """
+    variants = template_library.variants('person_plus', [cached['scale']])
+    template = variants[0][1]
+    half_width = template.shape[1] // 2 + ICON_CACHE_MARGIN
+    half_height = template.shape[0] // 2 + ICON_CACHE_MARGIN
+    left = window.left + cached['offset_x'] - half_width
+    top = window.top + cached['offset_y'] - half_height
+    screen_width, screen_height = screen_backend.get_backend().screen_size()
+    if left < 0 or top < 0 or left + half_width * 2 > screen_width or top + half_height * 2 > screen_height:
+        return None
+
+    started = time.perf_counter()
+    patch = capture_screen_gray((left, top, half_width * 2, half_height * 2))
+    match = match_template_multiscale(patch, variants)
+    if match is None or match['score'] < ICON_CACHE_MIN_SCORE:
+        return None
+
+    match['x'] += left
+    match['y'] += top
+    match['elapsed_ms'] = (time.perf_counter() - started) * 1000
+    return match
+
 def find_person_plus_icon(window):
     """
     v2.0: 이미지 인식으로 '사람+' 아이콘의 위치를 찾습니다.
 
+    v2.1: 화면을 한 번만 캡처하고 배율별 matchTemplate 결과 하나로
+    모든 신뢰도 단계(ICON_CONFIDENCES)를 판정합니다.
+    카톡 창 영역만 캡처해서 검색하고, 못 찾은 경우에만 전체 화면을 검색합니다.
+    창 크기/DPI/카톡 버전이 같을 때 찾았던 위치(ICON_CACHE_FILE)가 있으면
+    그 주변만 확인하고 전체 검색은 생략합니다.
+
     Returns:
-        dict: {'x': x좌표, 'y': y좌표, 'offset_x': 오프셋x, 'offset_y': 오프셋y, 'confidence': 신뢰도}
+        dict: {'x': x좌표, 'y': y좌표, 'offset_x': 오프셋x, 'offset_y': 오프셋y, 'confidence': 신뢰도,
+               'score': 일치도, 'scale': 배율}
         None: 찾지 못한 경우
     """
     log_message("🔍 '사람+' 아이콘 위치 찾기 (이미지 인식)")
 
-    icon_path = "person_plus_icon.png"
+    icon_path = ICON_PATH
 
-    # 아이콘 파일 확인
-    if not os.path.exists(icon_path):
+    # 아이콘 템플릿 확인 (시작할 때 로드됨)
+    if not template_library.has('person_plus'):
         log_message(f"✗ 아이콘 파일이 없습니다: {icon_path}")
         log_message(f"→ 기본 좌표 사용 (offset +450, +66)")
         return None
 
     log_message(f"✓ 아이콘 파일 발견: {icon_path}")
+    log_message("이미지 인식 시작...")
 
-    # 여러 confidence 값으로 시도
-    confidences = [0.9, 0.8, 0.7, 0.6]
+    match = None
+    cache_key = None
+    cached = None
+    from_cache = False
+    try:
+        variants = template_library.variants('person_plus')
+
+        # 캐시된 위치 먼저
+        cache_key = get_icon_cache_key(window)
+        cached = load_icon_cache().get(cache_key)
+        if cached:
+            match = verify_cached_icon(window, cached)
+            if match:
+                from_cache = True
+                log_message(f"  캐시 위치 확인: 일치도 {match['score']*100:.1f}% ({match['elapsed_ms']:.0f}ms)")
+            else:
+                log_message("  캐시 위치에 아이콘 없음 → 다시 검색")
+
+        # 창 영역
+        region = get_icon_search_region(window) if match is None else None
+        if region:
+            match = locate_icon(variants, region)
+            if match:
+                log_message(f"  창 영역 {region[2]}x{region[3]}: 일치도 {match['score']*100:.1f}% "
+                            f"(배율 {match['scale']:.2f}, {match['elapsed_ms']:.0f}ms)")
+
+        # 창 영역에서 못 찾으면 전체 화면
+        if match is None or match['score'] < ICON_CONFIDENCES[-1]:
+            log_message("  창 영역에서 찾지 못함 → 전체 화면 검색")
+            match = locate_icon(variants)
+            if match:
+                log_message(f"  전체 화면: 일치도 {match['score']*100:.1f}% "
+                            f"(배율 {match['scale']:.2f}, {match['elapsed_ms']:.0f}ms)")
+    except Exception as e:
+        log_message(f"  에러: {e}")
+
+    if match:
+        # 최고 점수가 넘는 가장 높은 신뢰도 단계
+        conf = next((c for c in ICON_CONFIDENCES if match['score'] >= c), None)
+        if conf is not None:
+            x, y = match['x'], match['y']
+
+            offset_x = x - window.left
+            offset_y = y - window.top
+
+            log_message(f"✓ 아이콘 발견!")
+            log_message(f"  화면 좌표: ({x}, {y})")
+            log_message(f"  창 오프셋: (+{offset_x}, +{offset_y})")
+            log_message(f"  신뢰도: {conf*100:.0f}%")
+
+            location = {
+                'x': x,
+                'y': y,
+                'offset_x': offset_x,
+                'offset_y': offset_y,
+                'confidence': conf,
+                'score': match['score'],
+                'scale': match['scale']
+            }
+            # 캐시 주변에서 위치가 조금 바뀐 채로 찾았으면 보정된 위치로 갱신 (다음부터 같은 보정 반복 안 함)
+            if cache_key and (not from_cache or
+                              (offset_x, offset_y) != (cached['offset_x'], cached['offset_y'])):
+                if from_cache:
+                    log_message(f"  캐시 위치 보정: (+{cached['offset_x']}, +{cached['offset_y']}) → "
+                                f"(+{offset_x}, +{offset_y})")
+                save_icon_cache(cache_key, location)
+            return location
 
-    log_message("이미지 인식 시작...")
+    log_message("✗ 아이콘을 찾을 수 없습니다")
+    log_message("→ 기본 좌표 사용 (offset +450, +66)")
+    return None
+
+class UIStateTimeout(Exception):
+    """v2.1: 카카오톡 화면이 기대한 상태가 되지 않음 (시간 초과 또는 오류 팝업)"""
+
+_step_timings = {}
+_step_timings_lock = threading.Lock()
+
+def record_step_timing(step, elapsed_ms, outcome):
+    """v2.1: 단계별 대기 시간 기록 (outcome: detected / timeout / error / fallback)"""
+    with _step_timings_lock:
+        stats = _step_timings.setdefault(step, {
+            'count': 0,
+            'total_ms': 0.0,
+            'max_ms': 0.0,
+            'last_ms': 0.0,
+            'detected': 0,
+            'timeout': 0,
+            'error': 0,
+            'fallback': 0
+        })
+        stats['count'] += 1
+        stats[outcome] += 1
+        stats['total_ms'] += elapsed_ms
+        stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+        stats['last_ms'] = elapsed_ms
+
+def get_step_timings():
+    """
+    v2.1: 단계별 대기 통계
+
+    Returns:
+        dict: {step: {'count', 'avg_ms', 'max_ms', 'last_ms', 'detected', 'timeout', 'error', 'fallback'}}
+    """
+    with _step_timings_lock:
+        return {
+            step: {
+                'count': stats['count'],
+                'avg_ms': round(stats['total_ms'] / stats['count'], 1),
+                'max_ms': round(stats['max_ms'], 1),
+                'last_ms': round(stats['last_ms'], 1),
+                'detected': stats['detected'],
+                'timeout': stats['timeout'],
+                'error': stats['error'],
+                'fallback': stats['fallback']
+            }
+            for step, stats in _step_timings.items()
+        }
+
+def reset_step_timings():
+    with _step_timings_lock:
+        _step_timings.clear()
+
+def template_visible(name, region=None):
+    """v2.1: 템플릿이 화면(또는 영역)에 보이는지 - 아이콘을 찾은 배율이 있으면 그 배율만 비교"""
+    scales = [ICON_LOCATION['scale']] if ICON_LOCATION else None
+    match = match_template_multiscale(capture_screen_gray(region),
+                                      template_library.variants(name, scales),
+                                      stop_score=UI_TEMPLATE_MIN_SCORE)
+    return match is not None and match['score'] >= UI_TEMPLATE_MIN_SCORE
+
+def get_ui_search_region(window):
+    """
+    v2.1: UI 템플릿(친구 추가 창, 채팅창, 오류 팝업) 검색 영역 - 카톡 창 주변만 캡처
+
+    창보다 조금 넓게(UI_TEMPLATE_MARGIN) 잡고 주 모니터 밖으로 나간 부분은 잘라냅니다.
+
+    Returns:
+        tuple: (left, top, width, height)
+        None: 영역이 화면에 없는 경우 (전체 화면 검색)
+    """
+    screen_width, screen_height = screen_backend.get_backend().screen_size()
+    left = max(window.left - UI_TEMPLATE_MARGIN, 0)
+    top = max(window.top - UI_TEMPLATE_MARGIN, 0)
+    right = min(window.left + window.width + UI_TEMPLATE_MARGIN, screen_width)
+    bottom = min(window.top + window.height + UI_TEMPLATE_MARGIN, screen_height)
 
-    for conf in confidences:
+    if right <= left or bottom <= top:
+        return None
+    return (left, top, right - left, bottom - top)
+
+def get_kakao_pid(window):
+    """v2.1: 카카오톡 프로세스 ID (메인 창 캐시 사용, 알 수 없으면 None)"""
+    with _main_window_lock:
+        if _main_window_cache['hwnd'] == window._hWnd and _main_window_cache['pid'] is not None:
+            return _main_window_cache['pid']
+    try:
+        return screen_backend.get_backend().window_pid(window._hWnd)
+    except Exception:
+        return None
+
+def ui_state_detector(state, window):
+    """
+    v2.1: UI 상태 확인 함수 - 입력(클릭/키) 하기 전에 만듭니다
+
+    만들 때의 포그라운드 창을 기억해 두고, 카카오톡 프로세스의 새 창이 포그라운드가
+    되는지로 확인합니다 (창 제목은 시트 이름/프로필 이름과 다를 수 있어 사용하지 않음).
+    템플릿 이미지가 있으면 카톡 창 주변에서 찾는 것도 함께 확인합니다.
+
+    Args:
+        state: 'add_friend_dialog' (친구 추가 창이 뜸), 'chat_window' (채팅창이 열림),
+               'chat_focused' (채팅창이 포그라운드), 'chat_closed' (채팅창이 닫힘)
+
+    Returns:
+        callable: 상태가 되면 True를 돌려주는 함수
+        None: 이 백엔드/템플릿으로는 확인할 수 없는 상태 (고정 대기)
+    """
+    backend = screen_backend.get_backend()
+    region = get_ui_search_region(window)
+    template = state in ('add_friend_dialog', 'chat_window') and template_library.has(state)
+
+    def template_check():
+        return template_visible(state, region)
+
+    foreground = backend.foreground_window()
+    pid = get_kakao_pid(window) if foreground is not None else None
+    if pid is None:
+        return template_check if template else None
+
+    before = foreground[0]
+    main_hwnd = window._hWnd
+    if state == 'chat_window':
+        existing = {w._hWnd for w in backend.get_all_windows()}
+
+    def foreground_is_kakao(exclude):
+        hwnd = backend.foreground_window()[0]
+        if hwnd in exclude:
+            return False
         try:
-            log_message(f"  시도: confidence={conf*100:.0f}%")
+            return backend.window_pid(hwnd) == pid
+        except Exception:
+            return False
+
+    def new_kakao_window():
+        for w in backend.get_all_windows():
+            if w._hWnd not in existing:
+                try:
+                    if backend.window_pid(w._hWnd) == pid:
+                        return True
+                except Exception:
+                    pass
+        return False
+
+    if state == 'add_friend_dialog':
+        # 입력 전 포그라운드 창도, 메인 창도 아닌 카톡 창이 새로 포그라운드가 됨
+        check = lambda: foreground_is_kakao((before, main_hwnd))
+    elif state == 'chat_window':
+        # 채팅창이 포그라운드가 되거나, 포커스 없이 카톡 창이 새로 생김
+        check = lambda: foreground_is_kakao((before, main_hwnd)) or new_kakao_window()
+    elif state == 'chat_focused':
+        check = lambda: foreground_is_kakao((main_hwnd,))
+    elif state == 'chat_closed':
+        check = lambda: backend.foreground_window()[0] != before
+    else:
+        return None
 
-            location = pyautogui.locateOnScreen(icon_path, confidence=conf)
+    if template:
+        return lambda: check() or template_check()
+    return check
 
-            if location:
-                x, y = pyautogui.center(location)
+def wait_for_ui_state(step, detect, fallback_delay, timeout=UI_STEP_TIMEOUT, region=None):
+    """
+    v2.1: 화면이 다음 단계 상태가 될 때까지 대기
 
-                offset_x = x - window.left
-                offset_y = y - window.top
+    detect가 None이면(확인할 수 없는 상태) 기존 고정 대기 시간(fallback_delay)만큼 쉽니다.
+    오류 팝업 템플릿이 있으면 기다리는 동안 region(카톡 창 주변)에서 함께 확인합니다.
 
-                log_message(f"✓ 아이콘 발견!")
-                log_message(f"  화면 좌표: ({x}, {y})")
-                log_message(f"  창 오프셋: (+{offset_x}, +{offset_y})")
-                log_message(f"  신뢰도: {conf*100:.0f}%")
+    Raises:
+        UIStateTimeout: timeout 안에 상태가 되지 않았거나 오류 팝업이 뜬 경우
+    """
+    started = time.perf_counter()
 
-                return {
-                    'x': x,
-                    'y': y,
-                    'offset_x': offset_x,
-                    'offset_y': offset_y,
-                    'confidence': conf
-                }
-        except Exception as e:
-            # 파일 없음 에러가 아니면 로그 출력
-            if 'could not' not in str(e).lower() and 'file' not in str(e).lower():
-                log_message(f"  에러: {e}")
+    if detect is None:
+        time.sleep(fallback_delay)
+        record_step_timing(step, (time.perf_counter() - started) * 1000, 'fallback')
+        return
 
-    log_message("✗ 아이콘을 찾을 수 없습니다")
-    log_message("→ 기본 좌표 사용 (offset +450, +66)")
-    return None
+    check_error = template_library.has('error_popup')
+    deadline = started + timeout
+    while True:
+        if check_error and template_visible('error_popup', region):
+            record_step_timing(step, (time.perf_counter() - started) * 1000, 'error')
+            raise UIStateTimeout(f"{step}: 오류 팝업")
+        if detect():
+            record_step_timing(step, (time.perf_counter() - started) * 1000, 'detected')
+            time.sleep(UI_SETTLE_DELAY)
+            return
+        if time.perf_counter() >= deadline:
+            record_step_timing(step, (time.perf_counter() - started) * 1000, 'timeout')
+            raise UIStateTimeout(f"{step}: {timeout:.0f}초 시간 초과")
+        time.sleep(UI_POLL_INTERVAL)
 
 def add_friend_and_send_message(window, friend_data):
     """
     v2.0: 한 명의 친구 추가 및 메시지 전송 (이미지 인식 사용)
+
+    v2.1: 창이 뜨는 단계는 고정 대기 대신 화면 상태를 확인하며 기다립니다 (wait_for_ui_state).
+    제한 시간 안에 상태가 바뀌지 않으면 실패로 처리합니다.
     """
     name = friend_data['name']
     phone = friend_data['phone']
     message = friend_data['message']
+    backend = screen_backend.get_backend()
 
     try:
         global ICON_LOCATION
@@ -316,56 +1859,63 @@ def add_friend_and_send_message(window, friend_data):
             y = window.top + 66
             log_message(f"  위치: 기본 좌표 (offset +450, +66)")
 
-        pyautogui.click(x, y)
-        time.sleep(1.8)
+        # v2.1: 상태 확인은 입력 전에 만들어서 입력 전 포그라운드 창을 기억
+        region = get_ui_search_region(window)
+        detect = ui_state_detector('add_friend_dialog', window)
+        backend.click(x, y)
+        wait_for_ui_state('add_friend_dialog', detect, 1.8, region=region)
 
         # 2. 이름 붙여넣기
-        pyperclip.copy(name)
+        backend.copy_text(name)
         time.sleep(0.3)
-        pyautogui.hotkey('ctrl', 'v')
+        backend.hotkey('ctrl', 'v')
         time.sleep(0.8)
 
         # 3. Tab 3회 → 폰번호 입력창
         for i in range(3):
-            pyautogui.press('tab')
+            backend.press('tab')
             time.sleep(0.3)
 
         # 4. 폰번호 붙여넣기
-        pyperclip.copy(phone)
+        backend.copy_text(phone)
         time.sleep(0.3)
-        pyautogui.hotkey('ctrl', 'v')
+        backend.hotkey('ctrl', 'v')
         time.sleep(0.8)
 
         # 5. Tab 1회 + Enter → 친구 등록
-        pyautogui.press('tab')
+        backend.press('tab')
         time.sleep(0.5)
-        pyautogui.press('enter')
-        time.sleep(2.0)
+        backend.press('enter')
+        wait_for_ui_state('friend_registered', None, 2.0, region=region)
 
         # 6. Enter → 일대일채팅 창 열기
-        pyautogui.press('enter')
-        time.sleep(2.5)
+        detect = ui_state_detector('chat_window', window)
+        backend.press('enter')
+        wait_for_ui_state('chat_window', detect, 2.5, region=region)
 
         # 7. 메시지 전송 (있는 경우만)
         try:
             if message:
-                pyautogui.hotkey('alt', 'tab')
-                time.sleep(0.8)
+                detect = ui_state_detector('chat_focused', window)
+                backend.hotkey('alt', 'tab')
+                wait_for_ui_state('chat_focused', detect, 0.8, region=region)
 
-                pyperclip.copy(message)
+                backend.copy_text(message)
                 time.sleep(0.3)
-                pyautogui.hotkey('ctrl', 'v')
+                backend.hotkey('ctrl', 'v')
                 time.sleep(1.0)
 
-                pyautogui.press('enter')
+                backend.press('enter')
                 time.sleep(1.0)
             else:
-                pyautogui.hotkey('alt', 'tab')
-                time.sleep(0.5)
+                detect = ui_state_detector('chat_focused', window)
+                backend.hotkey('alt', 'tab')
+                wait_for_ui_state('chat_focused', detect, 0.5, region=region)
 
             # 8. 채팅창 닫기
-            pyautogui.press('esc')
-            time.sleep(1.0)
+            detect = ui_state_detector('chat_closed', window)
+            backend.press('esc')
+            wait_for_ui_state('chat_closed', detect, 1.0, region=region)
 
             # v2.0: 9. 카톡 메인창을 다시 최상단으로
             log_message("  카톡 메인창을 최상단으로 이동...")
@@ -376,8 +1926,10 @@ def add_friend_and_send_message(window, friend_data):
 
         except Exception as e:
             # 친구 추가 실패 케이스
+            if isinstance(e, UIStateTimeout):
+                log_message(f"  ⚠ 화면 상태 확인 실패 ({e})")
             for i in range(3):
-                pyautogui.press('esc')
+                backend.press('esc')
                 time.sleep(0.5)
 
             # v2.0: 실패해도 창 최상단으로
@@ -386,6 +1938,17 @@ def add_friend_and_send_message(window, friend_data):
 
             return False
 
+    except UIStateTimeout as e:
+        # v2.1: 친구 추가 창이 안 뜨거나 채팅창이 안 열림 - 열린 창을 닫고 실패 처리
+        log_message(f"  ⚠ 화면 상태 확인 실패 ({e})")
+        for i in range(3):
+            backend.press('esc')
+            time.sleep(0.5)
+        activate_window(window, silent=True)
+        time.sleep(0.5)
+
+        return False
+
     except Exception as e:
         log_message(f"✗ 에러: {e}")
 
@@ -397,108 +1960,204 @@ def add_friend_and_send_message(window, friend_data):
 
         return False
 
-def run_task(start, end, delay_min, delay_max):
-    """작업 실행"""
-    global task_status, ICON_LOCATION
+def run_task(start, end, delay_min, delay_max, skip_processed=True, resume=False, sheet_url=None,
+             stop_event=None, job_rows=None):
+    """
+    작업 실행
 
-    task_status['running'] = True
-    task_status['current'] = 0
-    task_status['logs'] = []
-    task_status['success_count'] = 0
-    task_status['fail_count'] = 0
+    Args:
+        skip_processed: v2.1 - 이미 성공 처리된 전화번호는 건너뜀
+        resume: v2.1 - 체크포인트의 작업을 이어서 진행 (저장된 주소록 사용, 시트 다시 읽지 않음)
+        sheet_url: v2.1 - 대상 시트 (기본: 현재 선택된 시트)
+        job_rows: v2.1 - 이어서 할 때 체크포인트에 저장된 작업 행 목록
 
-    log_message("🚀 작업 시작!")
+    v2.1: 호출하기 전에 task_state.begin()으로 실행 상태를 표시해야 합니다.
+    stop_event는 begin()이 돌려준 이 작업의 중단 이벤트입니다 (없으면 현재 작업의 이벤트).
+    """
+    global ICON_LOCATION
 
-    # 친구 데이터 읽기
-    friends = read_friends_data()
-    if not friends:
-        log_message("✗ 친구 데이터를 읽을 수 없습니다.")
-        task_status['running'] = False
-        return
+    # v2.1: 어떤 오류로 끝나도 체크포인트와 실행 상태를 정리 (begin()으로 시작한 작업은 항상 종료)
+    try:
+        if stop_event is None:
+            stop_event = task_state.stop_event
+
+        log_buffer.clear()
+        # 상태 초기화는 task_state.begin()에서 (작업 시작 요청 시)
+        reset_step_timings()
+        reset_activation_counts()
+
+        log_message("♻️ 작업 이어서 시작!" if resume else "🚀 작업 시작!")
+
+        # 친구 데이터 읽기
+        # v2.1: 작업 범위만 읽기
+        if sheet_url is None:
+            sheet_url = GOOGLE_SHEET_URL
+        if resume and job_rows is not None:
+            # v2.1: 체크포인트 행 번호가 처음 작업과 같은 연락처를 가리키도록 작업 시작 때의 목록 사용
+            log_message("✓ 작업 시작 때의 연락처로 이어서 진행 (시트 다시 읽지 않음)")
+            friends_to_process = [dict(friend) for friend in job_rows if start <= friend['row'] <= end]
+            stored = {friend['row']: ContactStore.fingerprint(friend)
+                      for friend in contact_store.get_range(sheet_url, start, end)}
+            changed = sum(1 for friend in friends_to_process
+                          if friend['row'] in stored and stored[friend['row']] != ContactStore.fingerprint(friend))
+            if changed:
+                log_message(f"⚠ 작업 시작 후 주소록에서 {changed}개 행이 바뀌었습니다 (작업 시작 때의 연락처로 진행)")
+        elif resume and contact_store.count(sheet_url):
+            log_message("✓ 저장된 주소록 사용 (시트 다시 읽지 않음)")
+            friends_to_process = contact_store.get_range(sheet_url, start, end)
+        else:
+            friends_to_process = read_friends_range(sheet_url, start, end)
 
-    friends_to_process = friends[start-1:end]
-    task_status['total'] = len(friends_to_process)
+        if friends_to_process is None:
+            log_message("✗ 친구 데이터를 읽을 수 없습니다.")
+            return
 
-    log_message(f"📋 {start}번부터 {end}번까지 총 {len(friends_to_process)}명 처리")
+        task_state.update(total=len(friends_to_process))
 
-    # 카톡 창 찾기
-    main_window = find_main_kakao_window()
-    if not main_window:
-        log_message("✗ 카카오톡 창을 찾을 수 없습니다!")
-        task_status['running'] = False
-        return
+        log_message(f"📋 {start}번부터 {end}번까지 총 {len(friends_to_process)}명 처리")
 
-    log_message(f"✓ 카톡 창 발견: {main_window.title}")
+        # v2.1: 범위 내 번호 검증 결과
+        rejected = sum(1 for friend in friends_to_process if friend['status'] != 'ok')
+        if rejected:
+            log_message(f"⚠ 잘못된/중복 번호 {rejected}명은 제외됩니다")
 
-    # 창 활성화
-    if not activate_window(main_window):
-        log_message("✗ 창 활성화 실패!")
-        task_status['running'] = False
-        return
+        # v2.1: 체크포인트 기록 시작
+        if resume:
+            job_checkpoint.resume(start)
+        else:
+            job_checkpoint.begin({
+                'sheet_url': sheet_url,
+                'start': start,
+                'end': end,
+                'delay_min': delay_min,
+                'delay_max': delay_max,
+                'skip_processed': skip_processed
+            }, friends_to_process)
 
-    log_message("✓ 창 활성화 완료!")
+        # 카톡 창 찾기
+        main_window = find_main_kakao_window()
+        if not main_window:
+            log_message("✗ 카카오톡 창을 찾을 수 없습니다!")
+            return
 
-    # v2.0: 이미지 인식으로 아이콘 위치 찾기
-    log_message("⚠️ 이미지 인식을 위해 카톡 창을 최상단으로 가져옵니다...")
-    activate_window(main_window, silent=True)
-    time.sleep(1.0)
+        log_message(f"✓ 카톡 창 발견: {main_window.title}")
 
-    ICON_LOCATION = find_person_plus_icon(main_window)
+        # 창 활성화
+        if not activate_window(main_window):
+            log_message("✗ 창 활성화 실패!")
+            return
 
-    if ICON_LOCATION:
-        log_message(f"✓ 아이콘 위치 자동 검색 성공! (offset +{ICON_LOCATION['offset_x']}, +{ICON_LOCATION['offset_y']})")
-        task_status['icon_found'] = True
-        task_status['icon_location'] = ICON_LOCATION
-    else:
-        log_message(f"⚠ 아이콘 위치 자동 검색 실패, 기본 좌표 사용 (+450, +66)")
-        task_status['icon_found'] = False
-
-    # 3초 카운트다운
-    for i in range(3, 0, -1):
-        log_message(f"⏰ {i}초...")
-        time.sleep(1)
-
-    # v2.0: 작업 시작 전 창 최상단으로
-    log_message("카톡 창을 최상단으로 가져옵니다...")
-    activate_window(main_window, silent=True)
-    time.sleep(1.0)
-
-    # 친구 추가 시작
-    for i, friend in enumerate(friends_to_process, 1):
-        if not task_status['running']:  # 중단 체크
-            log_message("⚠️ 작업이 중단되었습니다.")
-            break
+        log_message("✓ 창 활성화 완료!")
 
-        task_status['current'] = i
-        actual_number = start + i - 1
+        # v2.0: 이미지 인식으로 아이콘 위치 찾기
+        log_message("⚠️ 이미지 인식을 위해 카톡 창을 최상단으로 가져옵니다...")
+        activate_window(main_window, silent=True)
+        time.sleep(1.0)
 
-        log_message(f"👤 [{i}/{len(friends_to_process)}] (번호: {actual_number}) {friend['name']}")
+        ICON_LOCATION = find_person_plus_icon(main_window)
 
-        if add_friend_and_send_message(main_window, friend):
-            task_status['success_count'] += 1
-            log_message(f"✅ {friend['name']} 완료!")
+        if ICON_LOCATION:
+            log_message(f"✓ 아이콘 위치 자동 검색 성공! (offset +{ICON_LOCATION['offset_x']}, +{ICON_LOCATION['offset_y']})")
+            task_state.update(icon_found=True, icon_location=ICON_LOCATION)
         else:
-            task_status['fail_count'] += 1
-            log_message(f"⚠️ {friend['name']} 실패")
-
-        # 랜덤 딜레이
-        if i < len(friends_to_process):
-            if delay_min == delay_max:
-                wait_time = delay_min
+            log_message(f"⚠ 아이콘 위치 자동 검색 실패, 기본 좌표 사용 (+450, +66)")
+            task_state.update(icon_found=False)
+
+        # 3초 카운트다운
+        for i in range(3, 0, -1):
+            log_message(f"⏰ {i}초...")
+            time.sleep(1)
+
+        # v2.0: 작업 시작 전 창 최상단으로
+        log_message("카톡 창을 최상단으로 가져옵니다...")
+        activate_window(main_window, silent=True)
+        time.sleep(1.0)
+
+        # 친구 추가 시작
+        completed = True
+        for i, friend in enumerate(friends_to_process, 1):
+            if stop_event.is_set():  # 중단 체크 (이 작업의 중단 이벤트)
+                log_message("⚠️ 작업이 중단되었습니다.")
+                completed = False
+                break
+
+            task_state.update(current=i)
+            actual_number = friend['row']
+
+            # v2.1: 잘못된/시트 내 중복 번호는 UI 작업 전에 제외
+            if friend['status'] != 'ok':
+                task_state.increment('invalid_count')
+                reason = '잘못된 번호' if friend['status'] == 'invalid' else '시트 내 중복 번호'
+                log_message(f"⛔ [{i}/{len(friends_to_process)}] (번호: {actual_number}) "
+                            f"{friend['name']} - {reason} ({friend['phone']})")
+                job_checkpoint.record_row(actual_number, friend['status'])
+                continue
+
+            # 정규화된 번호로 입력
+            friend = dict(friend, phone=friend['phone_norm'])
+
+            # v2.1: 이미 처리한 번호는 UI 작업 없이 건너뛰기
+            if skip_processed:
+                processed = contact_store.get_processed(friend['phone'])
+                if processed and processed['outcome'] == 'success':
+                    task_state.increment('skip_count')
+                    processed_at = time.strftime('%m-%d %H:%M', time.localtime(processed['processed_at']))
+                    log_message(f"⏭ [{i}/{len(friends_to_process)}] (번호: {actual_number}) "
+                                f"{friend['name']} - 이미 처리됨 ({processed_at})")
+                    job_checkpoint.record_row(actual_number, 'skip')
+                    continue
+
+            log_message(f"👤 [{i}/{len(friends_to_process)}] (번호: {actual_number}) {friend['name']}")
+
+            if add_friend_and_send_message(main_window, friend):
+                task_state.increment('success_count')
+                contact_store.record_processed(friend, 'success', sheet_url)
+                job_checkpoint.record_row(actual_number, 'success')
+                log_message(f"✅ {friend['name']} 완료!")
             else:
-                wait_time = random.uniform(delay_min, delay_max)
-
-            log_message(f"⏰ {wait_time:.1f}초 대기...")
-            time.sleep(wait_time)
-
-    # 완료
-    log_message("=" * 40)
-    log_message("📊 작업 완료!")
-    log_message(f"✅ 성공: {task_status['success_count']}명")
-    log_message(f"❌ 실패: {task_status['fail_count']}명")
-    log_message("=" * 40)
-
-    task_status['running'] = False
+                task_state.increment('fail_count')
+                contact_store.record_processed(friend, 'fail', sheet_url)
+                job_checkpoint.record_row(actual_number, 'fail')
+                log_message(f"⚠️ {friend['name']} 실패")
+
+            # 랜덤 딜레이
+            if i < len(friends_to_process):
+                if delay_min == delay_max:
+                    wait_time = delay_min
+                else:
+                    wait_time = random.uniform(delay_min, delay_max)
+
+                log_message(f"⏰ {wait_time:.1f}초 대기...")
+                stop_event.wait(wait_time)  # 중단 요청이 오면 바로 깨어남
+
+        job_checkpoint.finish(completed)
+
+        # 완료
+        log_message("=" * 40)
+        log_message("📊 작업 완료!")
+        summary = task_state.snapshot()
+        log_message(f"✅ 성공: {summary['success_count']}명")
+        log_message(f"❌ 실패: {summary['fail_count']}명")
+        if summary['skip_count']:
+            log_message(f"⏭ 건너뜀 (이미 처리): {summary['skip_count']}명")
+        if summary['invalid_count']:
+            log_message(f"⛔ 제외 (잘못된/중복 번호): {summary['invalid_count']}명")
+        for step, stats in get_step_timings().items():
+            timeouts = stats['timeout'] + stats['error']
+            log_message(f"⏱ {step}: 평균 {stats['avg_ms']/1000:.1f}초, 최대 {stats['max_ms']/1000:.1f}초"
+                        + (f", 실패 {timeouts}회" if timeouts else ""))
+        activation = get_activation_counts()
+        log_message(f"🪟 창 활성화: 바로 {activation['fast']}회, activate {activation['activate']}회, "
+                    f"강제 {activation['ladder']}회" + (f" (실패 {activation['failed']}회)" if activation['failed'] else ""))
+        log_message("=" * 40)
+    except Exception as e:
+        log_message(f"✗ 작업 중 오류로 중단: {e}")
+    finally:
+        try:
+            job_checkpoint.finish(False)  # 이미 종료 기록이 있으면 아무것도 하지 않음
+        except Exception as e:
+            log_message(f"⚠ 체크포인트 종료 기록 실패: {e}")
+        task_state.update(running=False)
 
 @app.route('/')
 def index():
@@ -507,14 +2166,43 @@ def index():
 
 @app.route('/api/friends')
 def get_friends():
-    """친구 목록 조회"""
-    friends = read_friends_data()
-    if friends:
+    """
+    친구 목록 조회
+
+    v2.1: 페이지 단위 조회 (쿼리 파라미터)
+        offset, limit: 페이지 위치/크기 (기본 0, 100 / 최대 500)
+        q: 이름 또는 전화번호 검색
+        start, end: 행 번호 범위
+        refresh=1: 구글 시트 다시 불러오기 (저장된 데이터가 없으면 항상)
+    """
+    sheet_url = GOOGLE_SHEET_URL
+    if request.args.get('refresh') == '1' or not contact_store.get_sheet(sheet_url):
+        total = read_friends_data(sheet_url)
+    else:
+        total = contact_store.count(sheet_url)
+
+    if total:
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        limit = request.args.get('limit', FRIENDS_PAGE_SIZE, type=int)
+        limit = min(max(limit, 1), FRIENDS_PAGE_MAX)
+        q = request.args.get('q', '').strip()
+
+        friends, matched = contact_store.query(
+            sheet_url, offset, limit,
+            search=q,
+            start=request.args.get('start', type=int),
+            end=request.args.get('end', type=int)
+        )
         return jsonify({
             'success': True,
             'friends': friends,
-            'total': len(friends),
-            'sheet_url': task_status['sheet_url']
+            'total': total,
+            'matched': matched,
+            'offset': offset,
+            'limit': limit,
+            'q': q,
+            'sheet_url': task_state.sheet_url,
+            'sync': contact_store.get_sync_result(sheet_url)
         })
     else:
         return jsonify({
@@ -550,7 +2238,7 @@ def sheet_url():
             new_url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv&gid=0"
 
         GOOGLE_SHEET_URL = new_url
-        task_status['sheet_url'] = new_url
+        task_state.update(sheet_url=new_url)
 
         return jsonify({
             'success': True,
@@ -560,7 +2248,7 @@ def sheet_url():
     else:
         return jsonify({
             'success': True,
-            'url': task_status['sheet_url']
+            'url': task_state.sheet_url
         })
 
 @app.route('/api/addressbooks')
@@ -576,13 +2264,13 @@ def get_addressbooks():
 
     try:
         # 서버 API 호출
-        response = requests.get(
+        response = http_session.get(
             f"{API_BASE_URL}/accounts/addressbooks/",
+            'addressbooks',
             headers={
                 'Authorization': f'Bearer {license_key}',
                 'Content-Type': 'application/json'
             },
-            timeout=10,
             verify=False
         )
 
@@ -636,40 +2324,99 @@ def select_addressbook():
         export_url = google_sheet_url
 
     GOOGLE_SHEET_URL = export_url
-    task_status['sheet_url'] = export_url
-    task_status['selected_addressbook'] = {
+    task_state.update(sheet_url=export_url, selected_addressbook={
         'id': addressbook_id,
         'name': name,
         'url': google_sheet_url
-    }
+    })
+
+    # v2.1: 선택한 주소록 동기화 (변경분만 반영)
+    read_friends_data(export_url)
 
     return jsonify({
         'success': True,
         'message': f'주소록 "{name}"이 선택되었습니다.',
-        'export_url': export_url
+        'export_url': export_url,
+        'sync': contact_store.get_sync_result(export_url)
     })
 
-@app.route('/api/start', methods=['POST'])
-def start_task():
-    """작업 시작"""
-    global current_task
+@app.route('/api/sync', methods=['GET', 'POST'])
+def sync_friends():
+    """
+    v2.1: 주소록 변경분 동기화
+
+    GET: 마지막 동기화 결과 조회
+    POST: 지금 동기화 후 결과 반환
+    결과: {'total', 'inserted', 'updated', 'deleted', 'fetched_at'}
+    """
+    sheet_url = GOOGLE_SHEET_URL
 
-    if task_status['running']:
+    if request.method == 'POST' and read_friends_data(sheet_url) is None:
         return jsonify({
             'success': False,
-            'message': '이미 작업이 실행 중입니다.'
+            'message': '구글 시트 또는 CSV 파일을 찾을 수 없습니다.'
         })
 
+    result = contact_store.get_sync_result(sheet_url)
+    if not result:
+        return jsonify({
+            'success': False,
+            'message': '아직 동기화된 주소록이 없습니다.'
+        })
+
+    return jsonify({
+        'success': True,
+        'sheet_url': sheet_url,
+        'sync': result
+    })
+
+def parse_bool(value, default=False):
+    """v2.1: 요청 값을 bool로 (JSON bool 또는 "true"/"false", "1"/"0" 같은 문자열, 그 밖에는 기본값)"""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return value != 0
+    if isinstance(value, str):
+        value = value.strip().lower()
+        if value in ('true', '1', 'yes', 'on'):
+            return True
+        if value in ('false', '0', 'no', 'off'):
+            return False
+    return default
+
+def task_busy_response():
+    """v2.1: 작업을 시작할 수 없을 때 응답 (실행 중 / 이전 작업 중단 중)"""
+    if task_state.running:
+        message = '이미 작업이 실행 중입니다.'
+    else:
+        message = '이전 작업을 중단하는 중입니다. 잠시 후 다시 시도하세요.'
+    return jsonify({
+        'success': False,
+        'message': message
+    })
+
+@app.route('/api/start', methods=['POST'])
+def start_task():
+    """작업 시작"""
+    global current_task
+
     data = request.json
     start = int(data.get('start', 1))
     end = int(data.get('end', 1))
     delay_min = float(data.get('delay_min', 1.5))
     delay_max = float(data.get('delay_max', 1.5))
+    skip_processed = parse_bool(data.get('skip_processed'), default=True)
+
+    # v2.1: 실행 중 확인과 시작 표시를 한 번에 (동시 요청으로 두 번 시작되지 않도록)
+    stop_event = task_state.begin(current_task)
+    if stop_event is None:
+        return task_busy_response()
 
     # 백그라운드 스레드로 실행
     current_task = threading.Thread(
         target=run_task,
-        args=(start, end, delay_min, delay_max)
+        args=(start, end, delay_min, delay_max, skip_processed),
+        kwargs={'stop_event': stop_event}
     )
     current_task.daemon = True
     current_task.start()
@@ -679,10 +2426,123 @@ def start_task():
         'message': '작업이 시작되었습니다.'
     })
 
+@app.route('/api/validation')
+def get_validation():
+    """v2.1: 현재 시트의 전화번호 검증 리포트"""
+    sheet_url = GOOGLE_SHEET_URL
+    if not contact_store.get_sheet(sheet_url):
+        return jsonify({
+            'success': False,
+            'message': '아직 동기화된 주소록이 없습니다.'
+        })
+
+    report = contact_store.validation_report(sheet_url)
+    report['success'] = True
+    return jsonify(report)
+
+@app.route('/api/resume', methods=['GET', 'POST'])
+def resume_task():
+    """
+    v2.1: 마지막 작업 이어서 하기
+
+    GET: 이어서 할 수 있는 작업 정보 조회
+    POST: 체크포인트의 다음 미완료 행부터 작업 재시작
+    """
+    global current_task
+
+    job = job_checkpoint.load_last_job()
+    available = bool(job) and not job['completed'] and job['next_row'] <= job['end']
+
+    if request.method == 'GET':
+        if not job:
+            return jsonify({'success': True, 'available': False})
+        return jsonify({
+            'success': True,
+            # 실행 중인 작업의 체크포인트는 이어서 할 대상이 아님
+            'available': available and not task_state.running,
+            'job_id': job['job_id'],
+            'start': job['start'],
+            'end': job['end'],
+            'next_row': job['next_row'],
+            'outcomes': job['outcomes'],
+            'sheet_url': job['sheet_url']
+        })
+
+    if not available:
+        return jsonify({
+            'success': False,
+            'message': '이어서 할 작업이 없습니다.'
+        })
+
+    stop_event = task_state.begin(current_task)
+    if stop_event is None:
+        return task_busy_response()
+
+    current_task = threading.Thread(
+        target=run_task,
+        args=(job['next_row'], job['end'], job['delay_min'], job['delay_max']),
+        kwargs={
+            'skip_processed': job['skip_processed'],
+            'resume': True,
+            'sheet_url': job['sheet_url'],
+            'stop_event': stop_event,
+            'job_rows': job['rows']
+        }
+    )
+    current_task.daemon = True
+    current_task.start()
+
+    return jsonify({
+        'success': True,
+        'message': f"{job['next_row']}번부터 {job['end']}번까지 이어서 시작합니다."
+    })
+
+@app.route('/api/journal')
+def get_journal():
+    """v2.1: 처리 기록 통계 (결과별 건수)"""
+    stats = contact_store.processed_stats()
+    return jsonify({
+        'success': True,
+        'total': sum(stats.values()),
+        'outcomes': stats
+    })
+
+@app.route('/api/journal/clear', methods=['POST'])
+def clear_journal():
+    """v2.1: 처리 기록 초기화 (모든 번호를 다시 처리 대상으로)"""
+    if task_state.running:
+        return jsonify({
+            'success': False,
+            'message': '작업 실행 중에는 처리 기록을 초기화할 수 없습니다.'
+        })
+
+    cleared = contact_store.clear_processed()
+    return jsonify({
+        'success': True,
+        'message': f'처리 기록 {cleared}건을 삭제했습니다.'
+    })
+
+@app.route('/api/http-stats')
+def get_http_stats():
+    """v2.1: 외부 API 호출 통계 (엔드포인트별 요청 수/오류 수/응답 시간)"""
+    return jsonify({
+        'success': True,
+        'timings': http_session.get_timings()
+    })
+
+@app.route('/api/step-stats')
+def get_step_stats():
+    """v2.1: 친구 추가 단계별 대기 통계와 창 활성화 단계별 횟수 (현재/마지막 작업)"""
+    return jsonify({
+        'success': True,
+        'timings': get_step_timings(),
+        'activation': get_activation_counts()
+    })
+
 @app.route('/api/stop', methods=['POST'])
 def stop_task():
     """작업 중단"""
-    task_status['running'] = False
+    task_state.stop()
     return jsonify({
         'success': True,
         'message': '작업 중단 요청이 접수되었습니다.'
@@ -690,25 +2550,254 @@ def stop_task():
 
 @app.route('/api/status')
 def get_status():
-    """작업 상태 조회"""
-    return jsonify(task_status)
+    """
+    작업 상태 조회
+
+    v2.1: 잠금 안에서 만든 복사본을 반환합니다. 로그는 포함하지 않습니다 (/api/logs/stream).
+    """
+    status = task_state.snapshot()
+    status['log_subscribers'] = log_buffer.subscribers
+    return jsonify(status)
+
+def sse_unavailable():
+    """v2.1: SSE 연결이 너무 많으면 503 (waitress 스레드가 모두 스트림에 묶이지 않도록)"""
+    if log_buffer.subscribers < SSE_MAX_SUBSCRIBERS:
+        return None
+    response = jsonify({
+        'success': False,
+        'message': '실시간 연결이 너무 많습니다. 다른 대시보드 탭을 닫아주세요.'
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = str(SSE_RETRY_MS // 1000)
+    return response
+
+def get_last_event_seq():
+    """v2.1: SSE 재연결 시 마지막으로 받은 로그 순번 (Last-Event-ID 또는 ?last_event_id=)"""
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id', '')
+    last_seq = int(last_event_id) if last_event_id.isdigit() else 0
+    if last_seq > log_buffer.last_seq:
+        # 서버가 재시작되어 순번이 처음부터 다시 시작된 경우
+        last_seq = 0
+    return last_seq
 
 @app.route('/api/logs/stream')
 def stream_logs():
-    """실시간 로그 스트리밍"""
-    def generate():
-        last_log_count = 0
-        while True:
-            current_log_count = len(task_status['logs'])
-            if current_log_count > last_log_count:
-                # 새로운 로그만 전송
-                new_logs = task_status['logs'][last_log_count:]
-                for log in new_logs:
-                    yield f"data: {json.dumps(log)}\n\n"
-                last_log_count = current_log_count
-            time.sleep(0.5)
+    """
+    실시간 로그 스트리밍
+
+    v2.1: 새 로그가 추가될 때만 깨어나서 전송합니다 (0.5초 폴링 없음).
+    - 이벤트 id = 로그 순번 → 재연결 시 Last-Event-ID(또는 ?last_event_id=) 다음부터 이어서 전송
+    - 새 로그가 없으면 SSE_HEARTBEAT_INTERVAL마다 주석 한 줄 (끊긴 연결 감지)
+    - 클라이언트가 끊기면 제너레이터가 닫히면서 구독 해제
+    """
+    unavailable = sse_unavailable()
+    if unavailable:
+        return unavailable
+
+    def generate(last_seq):
+        log_buffer.subscribe(1)
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n"
+            while True:
+                logs = log_buffer.wait_since(last_seq, SSE_HEARTBEAT_INTERVAL)
+                if not logs:
+                    yield ": heartbeat\n\n"
+                    continue
+                for log in logs:
+                    yield f"id: {log['seq']}\ndata: {json.dumps(log)}\n\n"
+                last_seq = logs[-1]['seq']
+        finally:
+            log_buffer.subscribe(-1)
+
+    return Response(generate(get_last_event_seq()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/events')
+def stream_events():
+    """
+    v2.1: 대시보드 이벤트 스트림 (로그와 작업 상태를 SSE 하나로)
+
+    - event: log     로그 한 줄 (id = 로그 순번, Last-Event-ID로 이어 받기)
+    - event: status  작업 상태 (진행률, 아이콘 인식, 시트 수집) - 연결 즉시 한 번,
+                     이후 바뀔 때마다 초당 최대 STATUS_PUSH_RATE번으로 합쳐서 전송
+    - event: state   실행/중단 전환 {'running': bool} - 합치지 않고 전환마다 즉시 전송
+                     (상태를 합치는 사이에 시작과 중단이 함께 일어나도 둘 다 전송)
+    로그나 상태가 바뀔 때만 깨어나고, 아무것도 보내지 않은 채 SSE_HEARTBEAT_INTERVAL이
+    지나면 주석 한 줄을 보냅니다.
+    """
+    unavailable = sse_unavailable()
+    if unavailable:
+        return unavailable
+
+    def generate(last_seq):
+        log_buffer.subscribe(1)
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n"
+            version = event_notifier.version
+            transition_seq = task_state.transition_seq()
+            sent_status = None
+            status_sent_at = 0.0
+            last_sent_at = time.monotonic()
+
+            while True:
+                logs = log_buffer.since(last_seq)
+                for log in logs:
+                    yield f"id: {log['seq']}\nevent: log\ndata: {json.dumps(log)}\n\n"
+                if logs:
+                    last_seq = logs[-1]['seq']
+                    last_sent_at = time.monotonic()
+
+                transitions = task_state.transitions_since(transition_seq)
+                for transition_seq, running in transitions:
+                    yield f"event: state\ndata: {json.dumps({'running': running})}\n\n"
+
+                timeout = SSE_HEARTBEAT_INTERVAL
+                status = task_state.snapshot()
+                transition = bool(transitions)
+                if status != sent_status or transition:
+                    now = time.monotonic()
+                    next_status_at = status_sent_at + 1.0 / STATUS_PUSH_RATE
+                    if sent_status is None or transition or now >= next_status_at:
+                        yield f"event: status\ndata: {json.dumps(status)}\n\n"
+                        sent_status = status
+                        status_sent_at = last_sent_at = now
+                    else:
+                        # 너무 잦은 변경은 모아서 다음 전송 시각에
+                        timeout = next_status_at - now
+
+                if time.monotonic() - last_sent_at >= SSE_HEARTBEAT_INTERVAL:
+                    yield ": heartbeat\n\n"
+                    last_sent_at = time.monotonic()
+
+                version = event_notifier.wait(version, timeout)
+        finally:
+            log_buffer.subscribe(-1)
+
+    return Response(generate(get_last_event_seq()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def warm_up():
+    """
+    v2.1: 무거운 모듈 미리 로드
+
+    cv2/numpy(템플릿), 화면 백엔드(pyautogui/pygetwindow/win32)는 처음 쓸 때 임포트하므로
+    대시보드가 뜬 뒤 백그라운드에서 미리 불러 첫 작업이 임포트를 기다리지 않게 합니다.
+    실패해도 작업을 시작할 때 다시 시도합니다.
+    """
+    started = time.perf_counter()
+    try:
+        template_library.ensure_loaded()
+        screen_backend.get_backend()
+    except Exception as e:
+        print(f"⚠️ 인식 모듈 미리 로드 실패 (작업 시작 시 다시 시도): {e}")
+        return False
+
+    print(f"✅ 인식 모듈 미리 로드 완료 ({(time.perf_counter() - started) * 1000:.0f}ms)")
+    return True
+
+def start_warm_up():
+    """v2.1: warm_up()을 백그라운드 스레드로 실행"""
+    thread = threading.Thread(target=warm_up, name='warm-up', daemon=True)
+    thread.start()
+    return thread
+
+def get_server_settings(host=None, port=None, mode=None):
+    """
+    v2.1: 대시보드 서버 설정
 
-    return Response(generate(), mimetype='text/event-stream')
+    우선순위: 인자 → 환경 변수(ONLYTALK_HOST/ONLYTALK_PORT/ONLYTALK_SERVER_MODE)
+    → 설정 파일(server_host/server_port/server_mode) → 기본값
+
+    Returns:
+        tuple: (host, port, mode)
+    """
+    config = load_config()
+    host = host or os.environ.get('ONLYTALK_HOST') or config.get('server_host') or SERVER_HOST
+    port = int(port or os.environ.get('ONLYTALK_PORT') or config.get('server_port') or SERVER_PORT)
+    mode = (mode or os.environ.get('ONLYTALK_SERVER_MODE') or config.get('server_mode') or SERVER_MODE).lower()
+    return host, port, mode
+
+def bind_server_socket(host, port):
+    """
+    v2.1: 대시보드 서버 소켓 생성 (바인드 + listen)
+
+    waitress가 직접 만드는 소켓에는 SO_REUSEADDR이 설정되는데, 윈도우에서는 이 옵션 때문에
+    이미 사용 중인 포트에도 오류 없이 바인드되고 요청이 어느 프로세스로 갈지 알 수 없습니다.
+    그래서 소켓을 직접 만들어 윈도우에서는 SO_EXCLUSIVEADDRUSE로 포트를 독점합니다.
+    (그 밖의 OS에서 SO_REUSEADDR은 TIME_WAIT 포트만 허용하고 사용 중인 포트는 거부)
+
+    Raises:
+        OSError: 포트가 사용 중인 경우 등
+    """
+    family, socktype, proto, _, address = socket.getaddrinfo(
+        host, port, type=socket.SOCK_STREAM, flags=socket.AI_PASSIVE)[0]
+    sock = socket.socket(family, socktype, proto)
+    try:
+        if hasattr(socket, 'SO_EXCLUSIVEADDRUSE'):
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_EXCLUSIVEADDRUSE, 1)
+        else:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(address)
+        sock.listen(SERVER_BACKLOG)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+class DashboardServer:
+    """
+    v2.1: 대시보드 WSGI 서버
+
+    waitress: 스레드 수가 정해진(SERVER_THREADS) 운영 서버, 응답을 바로 전송하므로 SSE에 적합
+    dev: Flask(Werkzeug) 개발 서버 - 개발할 때만 사용
+    만들 때 bind_server_socket()으로 소켓을 독점 바인드하므로 포트가 사용 중이면
+    생성자에서 OSError가 납니다. 생성자가 끝나면 바로 접속을 받을 수 있습니다.
+    """
+
+    def __init__(self, host=SERVER_HOST, port=SERVER_PORT, mode=SERVER_MODE):
+        self.host = host
+        self.mode = mode
+
+        if mode == 'waitress':
+            try:
+                from waitress import create_server
+            except ImportError:
+                print("⚠️ waitress가 설치되어 있지 않아 개발 서버로 실행합니다. (pip install waitress)")
+                self.mode = 'dev'
+
+        if self.mode == 'waitress':
+            sock = bind_server_socket(host, port)
+            try:
+                self._server = create_server(app, sockets=[sock], threads=SERVER_THREADS,
+                                             ident='OnlyTalk')
+            except Exception:
+                sock.close()
+                raise
+            self.port = self._server.effective_port
+        elif self.mode == 'dev':
+            from werkzeug.serving import make_server
+            # Werkzeug가 직접 바인드하면 포트 충돌 시 OSError 대신 sys.exit()하므로 같은 소켓을 넘김
+            sock = bind_server_socket(host, port)
+            try:
+                self._server = make_server(host, port, app, threaded=True, fd=sock.fileno())
+            finally:
+                sock.close()  # Werkzeug가 복제한 소켓을 사용
+            self.port = self._server.port
+        else:
+            raise ValueError(f"알 수 없는 서버 모드: {mode}")
+
+    @property
+    def url(self):
+        """이 컴퓨터에서 접속할 주소"""
+        host = 'localhost' if self.host in ('0.0.0.0', '::', '') else self.host
+        return f"http://{host}:{self.port}"
+
+    def run(self):
+        """요청 처리 (서버가 닫힐 때까지 반환하지 않음)"""
+        if self.mode == 'waitress':
+            self._server.run()
+        else:
+            self._server.serve_forever()
 
 if __name__ == '__main__':
     import sys
@@ -725,13 +2814,23 @@ if __name__ == '__main__':
     print("  - 이미지 인식으로 '사람+' 아이콘 자동 검색")
     print("  - 창 활성화 강화 (Windows API 사용)")
     print("  - 매 작업 후 창 최상단 이동")
+    # v2.1: --dev면 Flask 개발 서버 (디버그 모드), 아니면 설정된 서버 모드
+    host, port, mode = get_server_settings(mode='dev' if '--dev' in sys.argv else None)
+
     print("\n🌐 서버 시작 중...")
+    print(f"  - 서버: {mode}" + (f" (스레드 {SERVER_THREADS}개)" if mode == 'waitress' else ""))
     print("\n접속 주소:")
-    print("  - 이 컴퓨터: http://localhost:5000")
-    print("  - 같은 네트워크: http://[내 IP]:5000")
+    print(f"  - 이 컴퓨터: http://localhost:{port}")
+    print(f"  - 같은 네트워크: http://[내 IP]:{port}")
     print("\n⚠️  서버를 중단하려면 Ctrl+C를 누르세요.")
     print("="*60)
     print()
 
-    # 0.0.0.0으로 바인딩하면 외부에서도 접속 가능
-    app.run(host='0.0.0.0', port=5000, debug=True, threaded=True)
+    if mode == 'dev':
+        # 0.0.0.0으로 바인딩하면 외부에서도 접속 가능
+        start_warm_up()
+        app.run(host=host, port=port, debug=True, threaded=True)
+    else:
+        server = DashboardServer(host, port, mode)
+        start_warm_up()
+        server.run()
@@ -0,0 +1,128 @@
+"""
+OnlyTalk 인식/작업 루프 벤치마크 (헤드리스)
+
+ReplayBackend로 app.py를 불러와서 윈도우 없이(리눅스 CI 포함) 측정합니다.
+
+- 아이콘 인식: 창 영역 / 전체 화면 matchTemplate 시간, find_person_plus_icon (캐시 없음/있음)
+- 작업 루프: add_friend_and_send_message 1명당 시간과 입력 이벤트 수
+
+사용법:
+    python benchmark.py                         # 합성 화면 (노이즈 배경에 아이콘)
+    python benchmark.py --frames 녹화폴더        # 녹화된 스크린샷 재생
+    python benchmark.py --iterations 50 --contacts 3
+"""
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault('ONLYTALK_SCREEN_BACKEND', 'replay')
+
+import numpy as np
+
+import screen_backend
+
+def synthetic_frame(icon, width, height, scale, position, seed=0):
+    """노이즈 배경에 아이콘을 배율대로 넣은 회색조 화면"""
+    import cv2
+
+    rng = np.random.default_rng(seed)
+    frame = (rng.random((height, width)) * 40 + 180).astype(np.uint8)
+    scaled = cv2.resize(icon, None, fx=scale, fy=scale) if scale != 1.0 else icon
+    x, y = position
+    frame[y:y + scaled.shape[0], x:x + scaled.shape[1]] = scaled
+    return frame
+
+def measure(func, iterations):
+    """func를 반복 실행한 시간 (ms) 목록"""
+    times = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - started) * 1000)
+    return times
+
+def report(label, times):
+    print(f"  {label:<28} 평균 {statistics.mean(times):8.1f}ms  "
+          f"중앙값 {statistics.median(times):8.1f}ms  최대 {max(times):8.1f}ms  (n={len(times)})")
+
+def main():
+    parser = argparse.ArgumentParser(description="OnlyTalk 헤드리스 벤치마크")
+    parser.add_argument('--frames', help="녹화된 스크린샷(PNG) 폴더")
+    parser.add_argument('--window', help="카톡 창 영역 left,top,width,height")
+    parser.add_argument('--width', type=int, default=3840, help="합성 화면 너비")
+    parser.add_argument('--height', type=int, default=2160, help="합성 화면 높이")
+    parser.add_argument('--scale', type=float, default=1.25, help="합성 화면의 아이콘 배율")
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--contacts', type=int, default=1, help="작업 루프 측정 인원 (0이면 생략)")
+    args = parser.parse_args()
+
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+
+    # 설정/저장소/캐시 파일은 임시 폴더에 (실제 데이터에 영향 없음)
+    work_dir = tempfile.mkdtemp(prefix='onlytalk-bench-')
+    for name in os.listdir(package_dir):
+        if name.lower().endswith('.png'):
+            shutil.copy(os.path.join(package_dir, name), work_dir)
+    os.chdir(work_dir)
+
+    import app
+
+    window_rect = tuple(int(v) for v in args.window.split(',')) if args.window else None
+    if args.frames:
+        backend = screen_backend.ReplayBackend(frames_dir=args.frames, window_rect=window_rect)
+    else:
+        icon = app.template_library.get('person_plus')
+        if icon is None:
+            parser.error("person_plus_icon.png가 없습니다")
+        if window_rect is None:
+            window_rect = (args.width // 2 - 400, args.height // 2 - 450, 800, 900)
+        position = (window_rect[0] + 450, window_rect[1] + 50)
+        frame = synthetic_frame(icon, args.width, args.height, args.scale, position)
+        backend = screen_backend.ReplayBackend(frames=[frame], window_rect=window_rect)
+    screen_backend.set_backend(backend)
+
+    window = backend.window
+    width, height = backend.screen_size()
+    print(f"화면 {width}x{height}, 창 ({window.left}, {window.top}) {window.width}x{window.height}, "
+          f"프레임 {len(backend.frames)}개")
+
+    # 1. 아이콘 인식
+    print("\n[아이콘 인식]")
+    variants = app.template_library.variants('person_plus')
+    region = app.get_icon_search_region(window)
+    report("창 영역 matchTemplate", measure(lambda: app.locate_icon(variants, region), args.iterations))
+    report("전체 화면 matchTemplate", measure(lambda: app.locate_icon(variants), max(1, args.iterations // 4)))
+
+    def find_cold():
+        if os.path.exists(app.ICON_CACHE_FILE):
+            os.remove(app.ICON_CACHE_FILE)
+        return app.find_person_plus_icon(window)
+
+    report("find_person_plus_icon (캐시 없음)", measure(find_cold, args.iterations))
+    location = app.find_person_plus_icon(window)
+    report("find_person_plus_icon (캐시)", measure(lambda: app.find_person_plus_icon(window), args.iterations))
+    if location:
+        print(f"  → 오프셋 (+{location['offset_x']}, +{location['offset_y']}), "
+              f"일치도 {location['score']*100:.1f}%, 배율 {location['scale']:.2f}")
+    else:
+        print("  → 아이콘을 찾지 못함")
+
+    # 2. 작업 루프
+    if args.contacts:
+        print("\n[작업 루프]")
+        app.ICON_LOCATION = location
+        friend = {'name': '벤치마크', 'phone': '01012345678', 'message': '안녕하세요'}
+        times = []
+        for _ in range(args.contacts):
+            backend.events.clear()
+            started = time.perf_counter()
+            app.add_friend_and_send_message(window, friend)
+            times.append((time.perf_counter() - started) * 1000)
+        report("add_friend_and_send_message", times)
+        print(f"  → 1명당 입력 이벤트 {len(backend.events)}개")
+
+if __name__ == '__main__':
+    main()
@@ -9,7 +9,13 @@ Changes:
 """
 import sys
 import os
+
+# v2.1: ONLYTALK_IMPORT_REPORT가 있으면 임포트 시간 기록 (다른 모듈보다 먼저)
+import import_report
+import_report.install()
+
 import requests
+import http_session
 import json
 import time
 import uuid
@@ -22,19 +28,14 @@ import webbrowser
 from flask import Flask, render_template_string, request, jsonify
 from flask_cors import CORS
 import csv
-import pyautogui
-import pyperclip
-import pygetwindow as gw
 import random
 from io import StringIO
-import win32gui
-import win32con
-import cv2
-import numpy as np
+# v2.1: pyautogui/pyperclip/pygetwindow/win32는 사용하는 함수 안에서 임포트 (시작 속도)
 
 # Configuration
 API_BASE_URL = "https://only-talk.kiam.kr/api"
 CONFIG_FILE = "onlytalk_config.json"
+SERVER_START_TIMEOUT = 30  # v2.1: 대시보드 서버 준비 대기 최대 시간 (초) - app.py 임포트 포함
 
 # HTML Template (raw string to preserve backslashes)
 HTML_TEMPLATE = r"""<!DOCTYPE html>
@@ -897,6 +898,8 @@ def read_friends_data(sheet_url=None):
 
 def find_main_kakao_window():
     """메인 카카오톡 창 찾기"""
+    import pygetwindow as gw
+
     all_windows = gw.getAllWindows()
     kakao_candidates = []
 
@@ -930,6 +933,9 @@ def activate_window(window, silent=False):
         window: 활성화할 창
         silent: True면 로그를 출력하지 않음
     """
+    import win32gui
+    import win32con
+
     try:
         # 최소화되어 있으면 복원
         if window.isMinimized:
@@ -1003,6 +1009,8 @@ def find_person_plus_icon(window):
         dict: {'x': x좌표, 'y': y좌표, 'offset_x': 오프셋x, 'offset_y': 오프셋y, 'confidence': 신뢰도}
         None: 찾지 못한 경우
     """
+    import pyautogui
+
     log_message("🔍 '사람+' 아이콘 위치 찾기 (이미지 인식)")
 
     icon_path = "person_plus_icon.png"
@@ -1057,6 +1065,9 @@ def add_friend_and_send_message(window, friend_data):
     """
     v2.0: 한 명의 친구 추가 및 메시지 전송 (이미지 인식 사용)
     """
+    import pyautogui
+    import pyperclip
+
     name = friend_data['name']
     phone = friend_data['phone']
     message = friend_data['message']
@@ -1524,6 +1535,9 @@ class OnlyTalkClient:
         self.root = tk.Tk()
         self.root.withdraw()
         self.flask_thread = None
+        self.dashboard_url = "http://localhost:5000"  # v2.1: 서버가 시작되면 실제 포트로 갱신
+        self.server_ready = threading.Event()  # v2.1: 서버 소켓이 열리거나 시작에 실패하면 set
+        self.server_error = None
 
     def get_device_id(self):
         computer_name = os.environ.get('COMPUTERNAME', 'UNKNOWN')
@@ -1565,10 +1579,10 @@ class OnlyTalkClient:
 
     def verify_license(self, license_key):
         try:
-            response = requests.post(
+            response = http_session.post(
                 f"{API_BASE_URL}/licenses/verify/",
+                'license',
                 json={"license_key": license_key, "device_id": self.device_id},
-                timeout=10,
                 verify=False
             )
             if response.status_code == 200:
@@ -1587,62 +1601,97 @@ class OnlyTalkClient:
             else:
                 export_url = sheet_url
 
-            response = requests.get(export_url, timeout=10)
-            response.encoding = 'utf-8'
-
-            if response.status_code == 200:
-                with open('kakao_friends.csv', 'w', encoding='utf-8') as f:
-                    f.write(response.text)
-                lines = response.text.strip().split('\n')
-                self.show_message("성공", f"구글 시트에서 {len(lines)}명의 데이터 다운로드 완료")
-                return True
-            else:
-                self.show_message("오류", f"구글 시트 다운로드 실패: {response.status_code}", 'error')
-                return False
+            # 본문을 청크 단위로 받아 바로 파일에 기록 (전체를 메모리에 올리지 않음)
+            with http_session.get(export_url, 'sheet', stream=True) as response:
+                if response.status_code != 200:
+                    self.show_message("오류", f"구글 시트 다운로드 실패: {response.status_code}", 'error')
+                    return False
+
+                line_count = 0
+                last_byte = b'\n'
+                tmp_path = 'kakao_friends.csv.tmp'
+                with open(tmp_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        f.write(chunk)
+                        line_count += chunk.count(b'\n')
+                        last_byte = chunk[-1:]
+                os.replace(tmp_path, 'kakao_friends.csv')
+
+            # 마지막 줄에 줄바꿈이 없으면 한 줄 더
+            if last_byte != b'\n':
+                line_count += 1
+            self.show_message("성공", f"구글 시트에서 {line_count}명의 데이터 다운로드 완료")
+            return True
         except Exception as e:
             self.show_message("오류", f"구글 시트 다운로드 오류:\n{e}", 'error')
             return False
 
     def start_flask_server_thread(self):
-        """Flask 서버를 스레드로 시작"""
+        """
+        Flask 서버를 스레드로 시작
+
+        v2.1: 서버 스레드가 소켓을 바인드하면 server_ready로 바로 알립니다 (HTTP 폴링 없음).
+        포트 사용 중 등 시작 오류는 server_error에 담아 즉시 알립니다.
+
+        Returns:
+            bool: 서버가 접속을 받을 수 있으면 True
+        """
         def run_flask():
-            # PyInstaller 경로 처리
-            if getattr(sys, 'frozen', False):
-                bundle_dir = getattr(sys, '_MEIPASS', os.path.dirname(__file__))
-            else:
-                bundle_dir = os.path.dirname(__file__)
+            try:
+                # PyInstaller 경로 처리
+                if getattr(sys, 'frozen', False):
+                    bundle_dir = getattr(sys, '_MEIPASS', os.path.dirname(__file__))
+                else:
+                    bundle_dir = os.path.dirname(__file__)
 
-            # app.py 임포트 및 실행
-            app_py = os.path.join(bundle_dir, 'app.py')
+                # app.py 임포트 및 실행
+                app_py = os.path.join(bundle_dir, 'app.py')
+
+                if not os.path.exists(app_py):
+                    raise FileNotFoundError(f"app.py not found at {app_py}")
 
-            if os.path.exists(app_py):
                 # app.py를 동적으로 실행
                 import importlib.util
                 spec = importlib.util.spec_from_file_location("flask_app", app_py)
                 flask_module = importlib.util.module_from_spec(spec)
                 spec.loader.exec_module(flask_module)
 
-                # Flask 앱 실행
-                flask_module.app.run(host='0.0.0.0', port=5000, debug=False, use_reloader=False)
-            else:
-                print(f"app.py not found at {app_py}")
+                # v2.1: 운영 서버(waitress)로 실행 - 주소/포트/모드는 설정 파일 또는 환경 변수
+                # 생성자에서 소켓을 독점 바인드(윈도우 SO_EXCLUSIVEADDRUSE)하고 listen하므로
+                # 포트가 사용 중이면 여기서 OSError, 성공하면 이 시점부터 접속 가능
+                host, port, mode = flask_module.get_server_settings()
+                try:
+                    server = flask_module.DashboardServer(host, port, mode)
+                except OSError as e:
+                    raise OSError(f"포트 {port}을(를) 열 수 없습니다. 다른 프로그램(또는 이미 실행 중인 OnlyTalk)이 "
+                                  f"사용 중인지 확인하세요.\n({e})") from e
+            except BaseException as e:
+                # SystemExit 등도 대기 중인 메인 스레드에 바로 알림
+                self.server_error = str(e) or type(e).__name__
+                print(f"❌ 서버 시작 실패: {self.server_error}")
+                self.server_ready.set()
+                return
 
+            self.dashboard_url = server.url
+            self.server_ready.set()
+            # v2.1: cv2/템플릿/화면 백엔드는 대시보드가 뜬 뒤 백그라운드에서 미리 로드
+            flask_module.start_warm_up()
+            server.run()
+
+        self.server_ready.clear()
+        self.server_error = None
         self.flask_thread = threading.Thread(target=run_flask, daemon=True)
         self.flask_thread.start()
 
-        # 서버 시작 대기
-        for i in range(15):
-            time.sleep(1)
-            try:
-                response = requests.get("http://localhost:5000", timeout=1)
-                if response.status_code in [200, 404]:
-                    return True
-            except:
-                continue
+        # 서버 준비 대기 (바인드 성공 또는 실패 즉시 반환)
+        if not self.server_ready.wait(SERVER_START_TIMEOUT):
+            self.server_error = f"{SERVER_START_TIMEOUT}초 안에 서버가 시작되지 않았습니다."
+            return False
 
-        return False
+        return self.server_error is None
 
     def run(self):
+        import_report.mark("OnlyTalkClient 시작")
         try:
             # 1. 라이선스 확인
             if 'license_key' in self.config and self.config['license_key']:
@@ -1658,6 +1707,7 @@ class OnlyTalkClient:
                     return
 
             # 2. 라이선스 검증
+            import_report.mark("라이선스 입력 완료")
             valid, license_data = self.verify_license(self.license_key)
             if not valid:
                 error_msg = "라이선스 인증 실패!\n\n"
@@ -1715,10 +1765,12 @@ class OnlyTalkClient:
 
             # 6. Flask 서버 시작
             if self.start_flask_server_thread():
-                webbrowser.open("http://localhost:5000")
+                import_report.mark("대시보드 서버 준비")
+                webbrowser.open(self.dashboard_url)
+                import_report.write_report()
                 self.show_message(
                     "OnlyTalk 시작 완료",
-                    "웹 대시보드가 열렸습니다.\n\n주소: http://localhost:5000\n\n종료하려면 이 창을 닫으세요."
+                    f"웹 대시보드가 열렸습니다.\n\n주소: {self.dashboard_url}\n\n종료하려면 이 창을 닫으세요."
                 )
                 # Tkinter 메인 루프 실행 (창이 닫힐 때까지 대기)
                 self.root.deiconify()  # 창 표시
@@ -1730,7 +1782,7 @@ class OnlyTalkClient:
                          bg="#f44336", fg="white", padx=20, pady=10).pack()
                 self.root.mainloop()
             else:
-                self.show_message("오류", "Flask 서버 시작 실패", 'error')
+                self.show_message("오류", f"Flask 서버 시작 실패\n\n{self.server_error}", 'error')
 
         except Exception as e:
             import traceback
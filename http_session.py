@@ -0,0 +1,131 @@
+"""
+OnlyTalk 공용 HTTP 세션
+
+서버 API(라이선스, 주소록)와 구글 시트 다운로드가 모두 하나의 requests.Session을
+사용하도록 합니다. 연결을 재사용(keep-alive)하므로 호출마다 TLS 핸드셰이크를 하지 않습니다.
+
+- 연결 풀: 호스트별 POOL_SIZE개 연결 유지
+- 재시도: 연결 오류와 429/5xx 응답은 지수 백오프로 재시도 (GET만)
+  읽기 타임아웃은 재시도하지 않음 (응답 없는 서버를 타임아웃 × 재시도 횟수만큼 기다리지 않도록)
+- 타임아웃: 엔드포인트별 (연결, 읽기) 기본값
+- 계측: 엔드포인트별 요청 수, 오류 수, 응답 시간 (get_timings)
+
+client_main.py(OnlyTalkClient)와 app.py(대시보드 서버)가 같은 프로세스에서
+이 모듈을 임포트하므로 세션 하나를 공유합니다.
+"""
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# 엔드포인트별 타임아웃 (연결, 읽기) - 초
+TIMEOUTS = {
+    'license': (5, 10),
+    'addressbooks': (5, 10),
+    'sheet': (5, 10),
+    'default': (5, 10),
+}
+
+POOL_SIZE = 10  # 호스트별 유지할 연결 수
+RETRY_TOTAL = 3  # 최대 재시도 횟수
+RETRY_READ = 0  # 읽기 오류(타임아웃) 재시도 횟수
+RETRY_BACKOFF = 0.5  # 재시도 간격 (0.5, 1, 2초 ...)
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+
+_timings = {}
+_timings_lock = threading.Lock()
+
+def get_session():
+    """공용 세션 (처음 호출할 때 생성)"""
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                retry = Retry(
+                    total=RETRY_TOTAL,
+                    read=RETRY_READ,
+                    backoff_factor=RETRY_BACKOFF,
+                    status_forcelist=RETRY_STATUS,
+                    allowed_methods=frozenset(['GET', 'HEAD']),
+                    raise_on_status=False
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=POOL_SIZE,
+                    pool_maxsize=POOL_SIZE,
+                    max_retries=retry
+                )
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+def _record(endpoint, elapsed_ms, error):
+    with _timings_lock:
+        stats = _timings.setdefault(endpoint, {
+            'count': 0,
+            'errors': 0,
+            'total_ms': 0.0,
+            'max_ms': 0.0,
+            'last_ms': 0.0
+        })
+        stats['count'] += 1
+        if error:
+            stats['errors'] += 1
+        stats['total_ms'] += elapsed_ms
+        stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+        stats['last_ms'] = elapsed_ms
+
+def request(method, url, endpoint='default', **kwargs):
+    """
+    공용 세션으로 요청
+
+    Args:
+        endpoint: 타임아웃/계측 구분용 이름 (TIMEOUTS 키)
+        kwargs: requests 인자 그대로 (timeout을 주면 기본값 대신 사용)
+
+    stream=True 요청의 응답 시간은 헤더를 받을 때까지입니다.
+    예외는 requests 예외를 그대로 전달합니다.
+    """
+    kwargs.setdefault('timeout', TIMEOUTS.get(endpoint, TIMEOUTS['default']))
+
+    started = time.perf_counter()
+    try:
+        response = get_session().request(method, url, **kwargs)
+    except requests.exceptions.RequestException:
+        _record(endpoint, (time.perf_counter() - started) * 1000, True)
+        raise
+
+    _record(endpoint, (time.perf_counter() - started) * 1000, response.status_code >= 400)
+    return response
+
+def get(url, endpoint='default', **kwargs):
+    return request('GET', url, endpoint, **kwargs)
+
+def post(url, endpoint='default', **kwargs):
+    return request('POST', url, endpoint, **kwargs)
+
+def get_timings():
+    """
+    엔드포인트별 요청 통계
+
+    Returns:
+        dict: {endpoint: {'count', 'errors', 'avg_ms', 'max_ms', 'last_ms'}}
+    """
+    with _timings_lock:
+        return {
+            endpoint: {
+                'count': stats['count'],
+                'errors': stats['errors'],
+                'avg_ms': round(stats['total_ms'] / stats['count'], 1),
+                'max_ms': round(stats['max_ms'], 1),
+                'last_ms': round(stats['last_ms'], 1)
+            }
+            for endpoint, stats in _timings.items()
+        }
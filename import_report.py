@@ -0,0 +1,146 @@
+"""
+OnlyTalk 임포트 시간 보고서
+
+python -X importtime 처럼 모듈별 임포트 시간을 기록합니다.
+PyInstaller로 만든 exe에는 -X 옵션을 줄 수 없으므로 환경 변수로 켭니다.
+
+    set ONLYTALK_IMPORT_REPORT=1                  → onlytalk_import_report.txt
+    set ONLYTALK_IMPORT_REPORT=C:\\temp\\report.txt  → 지정한 파일
+
+client_main.py가 다른 모듈보다 먼저 install()을 호출하고, 시작 단계마다 mark()로
+시점을 남깁니다. 보고서는 write_report()를 호출할 때와 프로그램이 끝날 때 저장됩니다.
+
+import 문(builtins.__import__)만 측정합니다. importlib.import_module로 불러온 모듈은
+그 모듈 안의 import 문부터 기록됩니다.
+"""
+import atexit
+import builtins
+import os
+import sys
+import threading
+import time
+
+REPORT_ENV = 'ONLYTALK_IMPORT_REPORT'
+DEFAULT_REPORT_FILE = 'onlytalk_import_report.txt'
+SUMMARY_SIZE = 20  # 요약에 보여줄 최상위 임포트 수
+
+_original_import = None
+_started = None
+_report_path = None
+_records = []  # (순서, 스레드, 깊이, 모듈, 자체 us, 누적 us)
+_marks = []  # (경과 ms, 이름)
+_lock = threading.Lock()
+_local = threading.local()
+
+def _resolve(name, globals, level):
+    """상대 임포트를 절대 모듈 이름으로"""
+    if not level:
+        return name
+    package = (globals or {}).get('__package__') or ''
+    base = package.rsplit('.', level - 1)[0] if level > 1 else package
+    return f"{base}.{name}" if name else base
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    try:
+        module_name = _resolve(name, globals, level)
+    except Exception:
+        module_name = name
+    if module_name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+
+    stack.append(0.0)  # 하위 임포트 누적 시간
+    started = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        cumulative = (time.perf_counter() - started) * 1_000_000
+        children = stack.pop()
+        if stack:
+            stack[-1] += cumulative
+        with _lock:
+            _records.append((len(_records), threading.current_thread().name, len(stack),
+                             module_name, cumulative - children, cumulative))
+
+def report_path():
+    """환경 변수로 지정한 보고서 경로 (꺼져 있으면 None)"""
+    value = os.environ.get(REPORT_ENV, '').strip()
+    if not value or value == '0':
+        return None
+    return DEFAULT_REPORT_FILE if value == '1' else value
+
+def install(path=None):
+    """
+    임포트 계측 시작 (이미 켜져 있거나 보고서 경로가 없으면 아무것도 하지 않음)
+
+    Returns:
+        bool: 계측 중이면 True
+    """
+    global _original_import, _started, _report_path
+
+    if _original_import is not None:
+        return True
+    path = path or report_path()
+    if not path:
+        return False
+
+    _report_path = path
+    _started = time.perf_counter()
+    _original_import = builtins.__import__
+    builtins.__import__ = _timed_import
+    atexit.register(write_report)
+    return True
+
+def is_enabled():
+    return _original_import is not None
+
+def mark(label):
+    """시작 단계 기록 (계측 중이 아니면 무시)"""
+    if _started is None:
+        return
+    with _lock:
+        _marks.append(((time.perf_counter() - _started) * 1000, label))
+
+def format_report():
+    """-X importtime 형식의 보고서 문자열"""
+    with _lock:
+        records = list(_records)
+        marks = list(_marks)
+
+    lines = [f"OnlyTalk 임포트 시간 보고서 ({time.strftime('%Y-%m-%d %H:%M:%S')})",
+             f"frozen: {bool(getattr(sys, 'frozen', False))}, python {sys.version.split()[0]}", ""]
+
+    if marks:
+        lines.append("[시작 단계] (계측 시작부터 ms)")
+        lines.extend(f"  {elapsed:10.1f}  {label}" for elapsed, label in marks)
+        lines.append("")
+
+    top_level = sorted((r for r in records if r[2] == 0), key=lambda r: r[5], reverse=True)
+    lines.append(f"[가장 느린 최상위 임포트 {SUMMARY_SIZE}개] (누적 ms)")
+    for _, thread, _, module, _, cumulative in top_level[:SUMMARY_SIZE]:
+        where = '' if thread == 'MainThread' else f"  ({thread})"
+        lines.append(f"  {cumulative / 1000:10.1f}  {module}{where}")
+    lines.append("")
+
+    # -X importtime과 같이 하위 모듈이 먼저 끝나므로 완료 순서대로 출력
+    lines.append("import time: self [us] | cumulative | imported package")
+    for _, thread, depth, module, self_us, cumulative in records:
+        where = '' if thread == 'MainThread' else f"  [{thread}]"
+        lines.append(f"import time: {self_us:9.0f} | {cumulative:10.0f} | {'  ' * depth}{module}{where}")
+    return '\n'.join(lines) + '\n'
+
+def write_report(path=None):
+    """보고서 저장 (계측 중이 아니면 None)"""
+    path = path or _report_path
+    if _started is None or not path:
+        return None
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(format_report())
+    except OSError as e:
+        print(f"⚠️ 임포트 보고서 저장 실패: {e}")
+        return None
+    return path
@@ -34,6 +34,9 @@ class OnlyTalkInstaller:
         files_to_copy = [
             "client_main.py",
             "app.py",
+            "http_session.py",
+            "screen_backend.py",
+            "import_report.py",
             "kakao_friends.csv",
             "README_CLIENT.md"
         ]
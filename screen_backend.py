@@ -0,0 +1,378 @@
+"""
+OnlyTalk 화면 캡처/입력 백엔드
+
+app.py의 이미지 인식과 작업 루프는 화면 캡처, 키보드/마우스 입력, 창 조작을 모두
+이 모듈의 백엔드를 통해 합니다.
+
+- WindowsBackend: 실제 PC (win32 BitBlt 캡처, pyautogui 입력, pygetwindow 창 목록)
+- ReplayBackend: 헤드리스 (녹화된 스크린샷을 재생하고 입력은 기록만 함)
+  윈도우가 아닌 환경(리눅스 CI)에서 인식 속도와 작업 루프 지연을 측정할 때 사용
+
+백엔드 선택: 환경 변수 ONLYTALK_SCREEN_BACKEND (windows / replay, 기본 windows)
+replay 백엔드는 ONLYTALK_REPLAY_DIR 폴더의 PNG 파일을 이름 순서대로 재생합니다.
+"""
+import os
+import threading
+import time
+
+# cv2/numpy는 캡처할 때 임포트 (이 모듈을 임포트하는 app.py의 시작 속도)
+
+BACKEND_ENV = 'ONLYTALK_SCREEN_BACKEND'
+REPLAY_DIR_ENV = 'ONLYTALK_REPLAY_DIR'
+
+_backend = None
+_backend_lock = threading.Lock()
+
+class ScreenBackend:
+    """
+    캡처/입력 백엔드 인터페이스
+
+    창 객체는 pygetwindow 창과 같은 속성을 가집니다:
+    title, left, top, width, height, isMinimized, _hWnd, activate(), maximize(), restore()
+    """
+
+    name = 'base'
+
+    def screen_size(self):
+        """주 모니터 크기 (width, height)"""
+        raise NotImplementedError
+
+    def capture_gray(self, region=None):
+        """화면 캡처 (회색조 NumPy 배열), region: (left, top, width, height) - None이면 주 모니터 전체"""
+        raise NotImplementedError
+
+    def click(self, x, y):
+        raise NotImplementedError
+
+    def press(self, key):
+        raise NotImplementedError
+
+    def hotkey(self, *keys):
+        raise NotImplementedError
+
+    def copy_text(self, text):
+        """클립보드에 복사"""
+        raise NotImplementedError
+
+    def get_all_windows(self):
+        raise NotImplementedError
+
+    def foreground_window(self):
+        """포그라운드 창 (hwnd, 제목) - 알 수 없는 백엔드는 None"""
+        return None
+
+    def is_window(self, hwnd):
+        """hwnd가 아직 살아 있는 창인지"""
+        return False
+
+    def window_pid(self, hwnd):
+        """창을 소유한 프로세스 ID"""
+        return None
+
+    def window_title(self, hwnd):
+        return ''
+
+    def window_from_handle(self, hwnd):
+        """hwnd로 창 객체 만들기 (창 목록을 다시 열거하지 않음)"""
+        return None
+
+    def restore_window(self, window):
+        """최소화된 창 복원"""
+        raise NotImplementedError
+
+    def set_topmost(self, window, topmost):
+        """창을 최상위로 고정/해제"""
+        raise NotImplementedError
+
+    def window_dpi(self, window):
+        """창의 DPI (96 = 100%)"""
+        return 96
+
+    def window_exe_version(self, window):
+        """창을 소유한 실행 파일의 버전 (확인할 수 없으면 'unknown')"""
+        return 'unknown'
+
+class WindowsBackend(ScreenBackend):
+    """실제 윈도우 화면 - 캡처는 BitBlt로 필요한 영역만 복사, 입력은 pyautogui"""
+
+    name = 'windows'
+
+    def __init__(self):
+        # 윈도우 전용 모듈은 이 백엔드를 만들 때만 임포트
+        import pyautogui
+        import pyperclip
+        import pygetwindow
+        import win32gui
+        import win32con
+        import win32api
+        import win32process
+        import win32ui
+
+        self.pyautogui = pyautogui
+        self.pyperclip = pyperclip
+        self.pygetwindow = pygetwindow
+        self.win32gui = win32gui
+        self.win32con = win32con
+        self.win32api = win32api
+        self.win32process = win32process
+        self.win32ui = win32ui
+
+    def screen_size(self):
+        return tuple(self.pyautogui.size())
+
+    def capture_gray(self, region=None):
+        if region is None:
+            region = (0, 0) + self.screen_size()
+        try:
+            return self._bitblt_gray(*region)
+        except Exception:
+            # BitBlt가 실패하면 (원격 데스크톱 등) pyautogui로 캡처
+            import cv2
+            import numpy as np
+
+            screenshot = self.pyautogui.screenshot(region=tuple(region))
+            return cv2.cvtColor(np.asarray(screenshot), cv2.COLOR_RGB2GRAY)
+
+    def _bitblt_gray(self, left, top, width, height):
+        import cv2
+        import numpy as np
+
+        win32gui, win32ui = self.win32gui, self.win32ui
+
+        desktop = win32gui.GetDesktopWindow()
+        desktop_dc = win32gui.GetWindowDC(desktop)
+        source_dc = win32ui.CreateDCFromHandle(desktop_dc)
+        memory_dc = source_dc.CreateCompatibleDC()
+        bitmap = win32ui.CreateBitmap()
+        try:
+            bitmap.CreateCompatibleBitmap(source_dc, width, height)
+            memory_dc.SelectObject(bitmap)
+            memory_dc.BitBlt((0, 0), (width, height), source_dc, (left, top), self.win32con.SRCCOPY)
+            pixels = np.frombuffer(bitmap.GetBitmapBits(True), dtype=np.uint8)
+            return cv2.cvtColor(pixels.reshape(height, width, 4), cv2.COLOR_BGRA2GRAY)
+        finally:
+            memory_dc.DeleteDC()
+            source_dc.DeleteDC()
+            win32gui.ReleaseDC(desktop, desktop_dc)
+            win32gui.DeleteObject(bitmap.GetHandle())
+
+    def click(self, x, y):
+        self.pyautogui.click(x, y)
+
+    def press(self, key):
+        self.pyautogui.press(key)
+
+    def hotkey(self, *keys):
+        self.pyautogui.hotkey(*keys)
+
+    def copy_text(self, text):
+        self.pyperclip.copy(text)
+
+    def get_all_windows(self):
+        return self.pygetwindow.getAllWindows()
+
+    def foreground_window(self):
+        hwnd = self.win32gui.GetForegroundWindow()
+        return (hwnd, self.win32gui.GetWindowText(hwnd))
+
+    def is_window(self, hwnd):
+        return bool(self.win32gui.IsWindow(hwnd))
+
+    def window_pid(self, hwnd):
+        return self.win32process.GetWindowThreadProcessId(hwnd)[1]
+
+    def window_title(self, hwnd):
+        return self.win32gui.GetWindowText(hwnd)
+
+    def window_from_handle(self, hwnd):
+        return self.pygetwindow.Win32Window(hwnd)
+
+    def restore_window(self, window):
+        self.win32gui.ShowWindow(window._hWnd, self.win32con.SW_RESTORE)
+
+    def set_topmost(self, window, topmost):
+        win32con = self.win32con
+        self.win32gui.SetWindowPos(window._hWnd,
+                                   win32con.HWND_TOPMOST if topmost else win32con.HWND_NOTOPMOST,
+                                   0, 0, 0, 0, win32con.SWP_NOMOVE | win32con.SWP_NOSIZE)
+
+    def window_dpi(self, window):
+        try:
+            import ctypes
+            return ctypes.windll.user32.GetDpiForWindow(window._hWnd) or 96
+        except Exception:
+            return 96
+
+    def window_exe_version(self, window):
+        win32api, win32process = self.win32api, self.win32process
+        try:
+            _, pid = win32process.GetWindowThreadProcessId(window._hWnd)
+            handle = win32api.OpenProcess(0x0410, False, pid)  # PROCESS_QUERY_INFORMATION | PROCESS_VM_READ
+            try:
+                exe_path = win32process.GetModuleFileNameEx(handle, 0)
+            finally:
+                win32api.CloseHandle(handle)
+
+            info = win32api.GetFileVersionInfo(exe_path, '\\')
+            ms, ls = info['FileVersionMS'], info['FileVersionLS']
+            return f"{ms >> 16}.{ms & 0xFFFF}.{ls >> 16}.{ls & 0xFFFF}"
+        except Exception:
+            return 'unknown'
+
+class ReplayWindow:
+    """ReplayBackend의 가짜 카카오톡 창 (조작은 백엔드 이벤트로 기록)"""
+
+    def __init__(self, backend, title, left, top, width, height):
+        self._backend = backend
+        self._hWnd = 1
+        self.title = title
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.isMinimized = False
+
+    def activate(self):
+        self._backend.record('activate')
+
+    def maximize(self):
+        self._backend.record('maximize')
+
+    def restore(self):
+        self._backend.record('restore')
+
+class ReplayBackend(ScreenBackend):
+    """
+    헤드리스 백엔드 - 녹화된 스크린샷 재생
+
+    캡처는 현재 프레임을 돌려주고, 입력(클릭/키)이 들어올 때마다 다음 프레임으로 넘어갑니다
+    (마지막 프레임에서는 그대로). 입력은 실행하지 않고 events에 (시각, 종류, 인자)로 기록합니다.
+    포그라운드 창은 알 수 없으므로 UI 상태는 템플릿으로만 확인됩니다.
+    """
+
+    name = 'replay'
+
+    def __init__(self, frames=None, frames_dir=None, window_rect=None, title='카카오톡'):
+        """
+        Args:
+            frames: 회색조(또는 BGR) NumPy 배열 목록
+            frames_dir: PNG 파일 폴더 (frames가 없을 때)
+            window_rect: 가짜 카톡 창 (left, top, width, height) - 기본: 첫 프레임 전체
+        """
+        import cv2
+        import numpy as np
+
+        if frames is None:
+            frames = self.load_frames(frames_dir) if frames_dir else []
+        if not frames:
+            frames = [np.full((1080, 1920), 255, dtype=np.uint8)]
+        self.frames = [cv2.cvtColor(f, cv2.COLOR_BGR2GRAY) if f.ndim == 3 else f for f in frames]
+        self.frame_index = 0
+        self.events = []
+        self.clipboard = ''
+        self._lock = threading.Lock()
+
+        if window_rect is None:
+            height, width = self.frames[0].shape[:2]
+            window_rect = (0, 0, width, height)
+        self.window = ReplayWindow(self, title, *window_rect)
+
+    @staticmethod
+    def load_frames(frames_dir):
+        """폴더의 PNG 파일을 이름 순서대로 회색조로 로드"""
+        import cv2
+        import numpy as np
+
+        frames = []
+        for name in sorted(os.listdir(frames_dir)):
+            if name.lower().endswith('.png'):
+                data = np.fromfile(os.path.join(frames_dir, name), dtype=np.uint8)
+                frames.append(cv2.imdecode(data, cv2.IMREAD_GRAYSCALE))
+        return frames
+
+    def record(self, kind, *args):
+        with self._lock:
+            self.events.append((time.perf_counter(), kind, args))
+
+    def _advance(self):
+        with self._lock:
+            if self.frame_index < len(self.frames) - 1:
+                self.frame_index += 1
+
+    def screen_size(self):
+        height, width = self.frames[0].shape[:2]
+        return (width, height)
+
+    def capture_gray(self, region=None):
+        frame = self.frames[self.frame_index]
+        if region is None:
+            return frame
+        left, top, width, height = region
+        return frame[top:top + height, left:left + width]
+
+    def click(self, x, y):
+        self.record('click', x, y)
+        self._advance()
+
+    def press(self, key):
+        self.record('press', key)
+        self._advance()
+
+    def hotkey(self, *keys):
+        self.record('hotkey', *keys)
+        self._advance()
+
+    def copy_text(self, text):
+        self.clipboard = text
+        self.record('copy', text)
+
+    def get_all_windows(self):
+        return [self.window]
+
+    def is_window(self, hwnd):
+        return hwnd == self.window._hWnd
+
+    def window_pid(self, hwnd):
+        return 1
+
+    def window_title(self, hwnd):
+        return self.window.title
+
+    def window_from_handle(self, hwnd):
+        return self.window
+
+    def restore_window(self, window):
+        self.record('restore_window')
+
+    def set_topmost(self, window, topmost):
+        self.record('set_topmost', topmost)
+
+    def window_exe_version(self, window):
+        return 'replay'
+
+def create_backend(name=None):
+    """이름(없으면 환경 변수)으로 백엔드 생성"""
+    name = (name or os.environ.get(BACKEND_ENV) or 'windows').lower()
+    if name == 'windows':
+        return WindowsBackend()
+    if name == 'replay':
+        return ReplayBackend(frames_dir=os.environ.get(REPLAY_DIR_ENV))
+    raise ValueError(f"알 수 없는 화면 백엔드: {name}")
+
+def get_backend():
+    """공용 백엔드 (처음 호출할 때 생성)"""
+    global _backend
+
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend()
+    return _backend
+
+def set_backend(backend):
+    """공용 백엔드 교체 (벤치마크에서 ReplayBackend 주입용)"""
+    global _backend
+
+    with _backend_lock:
+        _backend = backend
+    return backend